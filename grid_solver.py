@@ -1,19 +1,186 @@
-import matplotlib.pyplot as plt
-from matplotlib.widgets import Button
 from collections import deque
 import multiprocessing as mp
+import queue
 import sys
+import time
+
+from solvers import (
+    cache as solution_cache,
+    counting,
+    kernel,
+    parallel,
+    puzzles,
+    recognize,
+    zip_solver_bidir,
+    zip_solver_dp,
+    zip_solver_sat,
+    zip_solver_segments,
+    zip_solver_v4,
+)
+from solvers.ordering import DEFAULT_ORDERING
+from solvers.progress import ProgressChannel
+from solvers.pruning import DEFAULT_RULES
 
 
 # --------- Solver process ----------
-def solver_process(grid, walls, update_queue, stop_event, update_interval_checks=30000):
+def solver_process(
+    grid,
+    walls,
+    update_queue,
+    stop_event,
+    update_interval_checks=30000,
+    engine="v4",
+    rules=DEFAULT_RULES,
+    ordering=DEFAULT_ORDERING,
+    tt_mb=32,
+    workers=1,
+    split_depth=8,
+    cache=True,
+    progress=None,
+):
     """
     Runs DFS solver in separate process and sends periodic updates via update_queue.
+    engine: "v4" (bitboard DFS), "v3" (original set/tuple DFS), "sat"
+    (CP-SAT constraint model, needs ortools), "dp" (frontier dp, also
+    counts solutions), "segments" (one waypoint-to-waypoint segment at a
+    time), "bidir" (half-paths from both ends, joined in the middle),
+    "kernel" (v3's search in compiled C, see solvers.kernel) or "count"
+    (every solution, with v4's pruning; see solvers.counting); sat, dp,
+    count and bidir send no progress messages unless bidir falls back to v4.
+    rules: v4 pruning rules to apply, in order (see solvers.pruning).
+    ordering: v4 move ordering (see solvers.ordering).
+    tt_mb: memory cap of the v4 failure memo, 0 disables it.
+    workers > 1: split the v4 search at split_depth and run it on that many
+    processes (see solvers.parallel); "checked" is summed over all of them.
     Messages:
       {"checked": int, "path": [(r,c),...]}  # progress
       {"found": True, "solution": [(r,c),...], "checked": int}  # on success
       {"done": True, "checked": int}  # finished w/o solution
+      {"done": True, "error": str, "checked": 0}  # the engine raised
+    v4 adds "pruned": {rule: nodes cut} to every message and
+    "tt": {"hits", "misses", ...} when the failure memo is on.
+    dp and count add "count": number of solutions to the final message.
+    cache: look the puzzle up in the solution cache (solvers.cache) first and
+    store what a finished search found; a cached answer comes as the final
+    message with "cached": True.
+    progress: name of a solvers.progress.ProgressChannel; progress snapshots
+    then go there instead of the queue, which only gets the final message.
     """
+    solutions = solution_cache.SolutionCache() if cache and engine != "count" else None
+    if solutions is not None:
+        try:
+            hit = solutions.get(grid, walls)
+        except solution_cache.ERRORS:
+            hit = solutions = None
+        if hit is not None:
+            if hit["found"]:
+                msg = {"found": True, "solution": hit["solution"]}
+            else:
+                msg = {"done": True}
+            update_queue.put({**msg, "checked": 0, "cached": True})
+            return
+
+    # closed when the process exits
+    channel = ProgressChannel.attach(progress) if progress else None
+
+    def on_progress(msg):
+        if channel is not None:
+            channel.publish(msg)
+            return
+        try:
+            update_queue.put(msg, block=False)
+        except:
+            pass
+
+    try:
+        if engine == "v3":
+            return solver_v3(
+                grid,
+                walls,
+                update_queue,
+                stop_event,
+                update_interval_checks,
+                on_progress,
+            )
+
+        options = dict(
+            rules=rules,
+            ordering=ordering,
+            tt_mb=tt_mb,
+            on_progress=on_progress,
+            stop_event=stop_event,
+            progress_interval=update_interval_checks,
+        )
+        if engine == "sat":
+            result = zip_solver_sat.solve(grid, walls, stop_event=stop_event)
+        elif engine == "dp":
+            result = zip_solver_dp.solve(grid, walls, stop_event=stop_event)
+        elif engine == "count":
+            result = counting.count_solutions(
+                grid,
+                walls,
+                rules=rules,
+                ordering=ordering,
+                tt_mb=tt_mb,
+                workers=workers,
+                split_depth=split_depth,
+                stop_event=stop_event,
+            )
+            result["found"] = result["solution"] is not None
+        elif engine == "kernel":
+            result = kernel.solve(
+                grid,
+                walls,
+                on_progress=on_progress,
+                stop_event=stop_event,
+                progress_interval=update_interval_checks,
+            )
+        elif engine == "bidir":
+            result = zip_solver_bidir.solve(grid, walls, **options)
+        elif engine == "segments":
+            result = zip_solver_segments.solve(
+                grid,
+                walls,
+                on_progress=on_progress,
+                stop_event=stop_event,
+                progress_interval=update_interval_checks,
+            )
+        elif workers > 1:
+            result = parallel.solve(
+                grid, walls, workers=workers, split_depth=split_depth, **options
+            )
+        else:
+            result = zip_solver_v4.solve(grid, walls, **options)
+    except Exception as e:
+        # the GUI waits for a final message: a failed engine must send one too
+        error = f"{type(e).__name__}: {e}"
+        update_queue.put({"done": True, "error": error, "checked": 0})
+        return
+    stats = {k: result[k] for k in ("checked", "pruned", "tt", "count") if k in result}
+    # a stopped search proves nothing, but a solution it found is still one
+    if solutions is not None and (result["found"] or not stop_event.is_set()):
+        try:
+            solutions.put(grid, walls, result["solution"])
+        except solution_cache.ERRORS:
+            pass
+    if result["found"]:
+        update_queue.put({"found": True, "solution": result["solution"], **stats})
+    elif stop_event.is_set():
+        update_queue.put({"done": True, "stopped": True, **stats})
+    else:
+        update_queue.put({"done": True, **stats})
+
+
+def solver_v3(
+    grid,
+    walls,
+    update_queue,
+    stop_event,
+    update_interval_checks=30000,
+    on_progress=None,
+):
+    """Original set/tuple DFS, kept as the reference engine. Progress goes to
+    on_progress if given, else to the queue."""
     N = len(grid)
 
     positions = {
@@ -77,12 +244,14 @@ def solver_process(grid, walls, update_queue, stop_event, update_interval_checks
 
         checked += 1
         if checked - last_update >= update_interval_checks:
-            try:
-                update_queue.put(
-                    {"checked": checked, "path": path + [(r, c)]}, block=False
-                )
-            except:
-                pass
+            msg = {"checked": checked, "path": path + [(r, c)]}
+            if on_progress is not None:
+                on_progress(msg)
+            else:
+                try:
+                    update_queue.put(msg, block=False)
+                except:
+                    pass
             last_update = checked
 
         new_next = next_search
@@ -127,12 +296,22 @@ def solver_process(grid, walls, update_queue, stop_event, update_interval_checks
 
 # --------- GUI + main process ----------
 class GridSolverGUI:
-    def __init__(self, N):
+    def __init__(
+        self, N, workers=1, engine="v4", grid=None, walls=(), path=None, blit=True
+    ):
         self.N = N
-        self.grid = [[0 for _ in range(N)] for _ in range(N)]
-        self.walls = set()
+        self.workers = workers
+        self.engine = engine
+        self.grid = [row[:] for row in grid] if grid else [[0] * N for _ in range(N)]
+        self.walls = {tuple(sorted(map(tuple, w))) for w in walls}
+        # Save adds the puzzle to this .zpz / .jsonl file
+        self.path = path or "puzzles.jsonl"
+
+        # Matplotlib figure; imported here, so solver processes (which import
+        # this module under spawn) and headless users of solver_process skip it
+        import matplotlib.pyplot as plt
+        from matplotlib.widgets import Button
 
-        # Matplotlib figure
         self.fig, self.ax = plt.subplots()
         plt.subplots_adjust(bottom=0.15)
 
@@ -144,7 +323,8 @@ class GridSolverGUI:
 
         # Solver process
         self.proc = None
-        self.queue = None
+        self.queue = None  # final messages
+        self.channel = None  # progress snapshots, see solvers.progress
         self.stop_event = None
         self.poll_timer = None
         self.solving = False
@@ -160,7 +340,21 @@ class GridSolverGUI:
         self.ax.axis("off")
         self.status_text = self.fig.text(0.02, 0.02, "Idle", fontsize=10)
 
+        # Blitting: the grid, walls and numbers are drawn once into a cached
+        # background; a path update restores it and draws only the animated
+        # artists (one line, one quiver and the status text) on top. Without
+        # it (or on a backend that cannot blit) every update redraws it all.
+        self.blit = blit and self.fig.canvas.supports_blit
+        self._background = None
+        self.frame_times = deque(maxlen=100)  # seconds per blitted frame
+        if self.blit:
+            self.make_live_artists()
+            self.fig.canvas.mpl_connect("draw_event", self.on_draw)
+
         # Buttons
+        save_ax = plt.axes([0.45, 0.02, 0.15, 0.06])
+        self.save_btn = Button(save_ax, "Save")
+        self.save_btn.on_clicked(self.on_save)
         solve_ax = plt.axes([0.62, 0.02, 0.15, 0.06])
         stop_ax = plt.axes([0.79, 0.02, 0.15, 0.06])
         self.solve_btn = Button(solve_ax, "Solve")
@@ -263,21 +457,39 @@ class GridSolverGUI:
                 (ln,) = self.ax.plot([x1, x2], [y, y], "k", lw=6)
             self._wall_lines.append(ln)
 
+    def on_save(self, event=None):
+        try:
+            puzzle = (None, self.grid, sorted(self.walls))
+            puzzles.save(self.path, [puzzle], append=True)
+        except (OSError, ValueError) as e:
+            self.status_text.set_text(f"Save failed: {e}")
+        else:
+            self.status_text.set_text(f"Saved to {self.path}")
+        self.refresh()
+
     # -------- Solver process control --------
     def on_solve(self, event=None):
         if self.solving:
             return
         self.queue, self.stop_event = mp.Queue(), mp.Event()
+        self.channel = ProgressChannel.create(self.N * self.N)
         grid_copy = [row[:] for row in self.grid]
         walls_copy = list(self.walls)
         self.proc = mp.Process(
             target=solver_process,
             args=(grid_copy, walls_copy, self.queue, self.stop_event),
+            kwargs={
+                "workers": self.workers,
+                "engine": self.engine,
+                "progress": self.channel.name,
+            },
         )
         self.proc.start()
         self.solving = True
         self.last_checked = 0
         self.status_text.set_text("Solving... checked 0 paths")
+        self.frame_times.clear()
+        self.refresh()
         if self.poll_timer is None:
             self.poll_timer = self.fig.canvas.new_timer(interval=100)
             self.poll_timer.add_callback(self.poll_queue)
@@ -300,24 +512,7 @@ class GridSolverGUI:
                 msg = self.queue.get_nowait()
                 updated = True
 
-                if msg.get("found"):
-                    self.draw_path(msg["solution"], temp=False)
-                    self.status_text.set_text(
-                        f"Solved! Found after {msg['checked']} checks"
-                    )
-                    self._clean_proc()
-                    return
-
-                if msg.get("done"):
-                    if msg.get("stopped"):
-                        self.status_text.set_text(
-                            f"Stopped after {msg['checked']} checks"
-                        )
-                    else:
-                        self.status_text.set_text(
-                            f"No solution after {msg['checked']} checks"
-                        )
-                    self._clean_proc()
+                if self.finish(msg):
                     return
 
                 if "checked" in msg and "path" in msg:
@@ -325,23 +520,96 @@ class GridSolverGUI:
                     last_status = msg["checked"]
                     last_path_msg = msg
 
+            # a process that exited without its final message crashed or was
+            # killed; a final message may still be on its way through the pipe
+            if self.proc is not None and not self.proc.is_alive():
+                while True:
+                    try:
+                        msg = self.queue.get(timeout=0.2)
+                    except queue.Empty:
+                        code = self.proc.exitcode
+                        msg = {
+                            "done": True,
+                            "error": f"solver process exited with code {code}",
+                            "checked": self.last_checked,
+                        }
+                    if self.finish(msg):
+                        return
+
+            # Progress comes through shared memory: only the newest snapshot
+            snapshot = self.channel.read() if self.channel else None
+            if snapshot is not None:
+                updated = True
+                last_status = snapshot["checked"]
+                last_path_msg = snapshot
+
             # Apply only the most recent status update
             if last_status is not None:
                 self.last_checked = last_status
+                frame = self.frame_ms()
                 self.status_text.set_text(
                     f"Solving... checked {self.last_checked} paths"
+                    + self._tt_summary(last_path_msg)
+                    + (f" [{frame:.1f} ms/frame]" if frame is not None else "")
                 )
-                if self.last_checked % 2000 == 0 and last_path_msg:
-                    self.draw_path(last_path_msg["path"], temp=True)
+                # blitted frames are cheap enough to show every snapshot
+                if last_path_msg and (self.blit or self.last_checked % 2000 == 0):
+                    self.show_path(last_path_msg["path"], temp=True)
 
         except Exception as e:
             print("poll error:", e)
 
         if updated:
-            self.fig.canvas.draw_idle()
+            self.refresh()
         if self.solving:
             self.poll_timer.start()
 
+    def finish(self, msg):
+        """Shows a final solver message; False if msg is not one."""
+        if msg.get("found"):
+            self.show_path(msg["solution"], temp=False)
+            self.status_text.set_text(
+                f"Solved! Found after {msg['checked']} checks"
+                + self._pruned_summary(msg)
+            )
+        elif msg.get("done"):
+            if msg.get("error"):
+                self.status_text.set_text(f"Solver failed: {msg['error']}")
+            elif msg.get("stopped"):
+                self.status_text.set_text(
+                    f"Stopped after {msg['checked']} checks"
+                    + self._pruned_summary(msg)
+                )
+            else:
+                self.status_text.set_text(
+                    f"No solution after {msg['checked']} checks"
+                    + self._pruned_summary(msg)
+                )
+        else:
+            return False
+        self._clean_proc()
+        self.refresh()
+        return True
+
+    @staticmethod
+    def _pruned_summary(msg):
+        pruned = msg.get("pruned")
+        summary = GridSolverGUI._tt_summary(msg)
+        if msg.get("cached"):
+            summary += " (from the solution cache)"
+        if "count" in msg:
+            summary += f" ({msg['count']} solutions)"
+        if pruned:
+            summary += "\npruned: " + ", ".join(f"{k} {v}" for k, v in pruned.items())
+        return summary
+
+    @staticmethod
+    def _tt_summary(msg):
+        tt = msg.get("tt")
+        if not tt:
+            return ""
+        return f" (memo hits {tt['hits']}, misses {tt['misses']}, size {tt['size']})"
+
     def _clean_proc(self):
         try:
             if self.proc:
@@ -350,6 +618,9 @@ class GridSolverGUI:
             pass
         self.proc = None
         self.queue = None
+        if self.channel:
+            self.channel.close()
+        self.channel = None
         self.stop_event = None
         self.solving = False
 
@@ -364,6 +635,85 @@ class GridSolverGUI:
             self._path_artist.set_color("blue" if temp else "green")
         self.fig.canvas.draw_idle()
 
+    # -------- Path drawing (blitting) --------
+    def make_live_artists(self):
+        import numpy as np
+
+        # one arrow per step of the longest path, unused ones NaN (not drawn)
+        steps = max(self.N * self.N - 1, 1)
+        nan = np.full(steps, np.nan)
+        (self._path_artist,) = self.ax.plot([], [], "-", lw=2, animated=True)
+        self._arrows = self.ax.quiver(
+            np.zeros(steps),
+            np.zeros(steps),
+            nan,
+            nan,
+            angles="xy",
+            scale_units="xy",
+            scale=1,
+            pivot="mid",
+            width=0.006,
+            headwidth=4,
+            headlength=5,
+            headaxislength=4.5,
+            animated=True,
+        )
+        self.status_text.set_animated(True)
+        self._live = [self._path_artist, self._arrows, self.status_text]
+
+    def on_draw(self, event):
+        # a full draw (resize, new numbers or walls) renews the background
+        canvas = self.fig.canvas
+        self._background = canvas.copy_from_bbox(self.fig.bbox)
+        for artist in self._live:
+            self.fig.draw_artist(artist)
+
+    def render_path(self, path, temp=True):
+        """Moves the path artists to path; shown by the next refresh()."""
+        import numpy as np
+
+        color = "blue" if temp else "green"
+        xy = np.array(path, dtype=float)[:, ::-1] + 0.5 if path else np.empty((0, 2))
+        self._path_artist.set_data(xy[:, 0], xy[:, 1])
+        self._path_artist.set_color(color)
+        # a short arrow in the middle of every step
+        steps = len(xy) - 1
+        offsets = np.zeros((self._arrows.N, 2))
+        uv = np.full((self._arrows.N, 2), np.nan)
+        if steps > 0:
+            offsets[:steps] = (xy[1:] + xy[:-1]) / 2
+            uv[:steps] = (xy[1:] - xy[:-1]) * 0.3
+        self._arrows.set_offsets(offsets)
+        self._arrows.set_UVC(uv[:, 0], uv[:, 1])
+        self._arrows.set_color(color)
+
+    def refresh(self):
+        """Shows the changes to the path and status text: blits them onto
+        the cached background, timing the frame, or redraws everything."""
+        canvas = self.fig.canvas
+        if not self.blit or self._background is None:
+            canvas.draw_idle()
+            return
+        start = time.perf_counter()
+        canvas.restore_region(self._background)
+        for artist in self._live:
+            self.fig.draw_artist(artist)
+        canvas.blit(self.fig.bbox)
+        self.frame_times.append(time.perf_counter() - start)
+
+    def frame_ms(self):
+        """Mean milliseconds of the last blitted frames, None before any."""
+        if not self.frame_times:
+            return None
+        return 1000 * sum(self.frame_times) / len(self.frame_times)
+
+    def show_path(self, path, temp=True):
+        if self.blit:
+            self.render_path(path, temp)
+        else:
+            self.draw_path(path, temp)
+
+    # -------- Path drawing (annotate, without blitting) --------
     def draw_path(self, path, temp=True):
         xs = [c + 0.5 for r, c in path]
         ys = [r + 0.5 for r, c in path]
@@ -415,17 +765,39 @@ class GridSolverGUI:
                 self.proc.terminate()
             except:
                 pass
+        if self.channel:
+            self.channel.close()
+            self.channel = None
 
     def run(self):
+        import matplotlib.pyplot as plt
+
         plt.show()
 
 
 def main():
-    if len(sys.argv) >= 2:
+    # the first argument is a grid size, a screenshot of a puzzle, or a
+    # puzzle file as FILE[:INDEX]
+    grid, walls, path = None, (), None
+    if len(sys.argv) >= 2 and sys.argv[1].lower().endswith(recognize.IMAGE_TYPES):
+        grid, walls = recognize.recognize(sys.argv[1])
+        N = len(grid)
+    elif len(sys.argv) >= 2 and not sys.argv[1].isdigit():
+        _, grid, walls = puzzles.open_puzzle(sys.argv[1])
+        N = len(grid)
+        path = puzzles.split_spec(sys.argv[1])[0]
+    elif len(sys.argv) >= 2:
         N = int(sys.argv[1])
     else:
         N = int(input("Enter grid size N: "))
-    gui = GridSolverGUI(N)
+    # optional extra arguments: number of solver processes and/or engine name
+    workers, engine = 1, "v4"
+    for arg in sys.argv[2:]:
+        if arg.isdigit():
+            workers = int(arg)
+        else:
+            engine = arg
+    gui = GridSolverGUI(N, workers, engine, grid, walls, path)
     gui.run()
 
 
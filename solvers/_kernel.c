@@ -0,0 +1,143 @@
+/* v4's DFS with v3's pruning (distance + connectivity) on flat arrays.
+ *
+ * Built by `python -m solvers.kernel` and loaded with ctypes from
+ * solvers/kernel.py, which also defines the matching structs. Boards up to
+ * 8x8, so a cell set fits in one uint64. The stack lives in the caller's
+ * search_t, so a search can stop after a budget of checks (to report
+ * progress or look at a stop flag) and resume where it left off. The path is
+ * one shared buffer indexed by depth: a frame at depth d only needs
+ * path[0..d-1], and those are not overwritten until every frame below it on
+ * the stack has been popped.
+ */
+
+#include <stdint.h>
+#include <stdlib.h>
+
+#ifdef _MSC_VER
+#include <intrin.h>
+#define popcount(x) ((int)__popcnt64(x))
+#define EXPORT __declspec(dllexport)
+#else
+#define popcount(x) __builtin_popcountll(x)
+#define EXPORT
+#endif
+
+#define MAX_CELLS 64
+#define MAX_VALUE 128
+#define MAX_FRAMES (4 * MAX_CELLS + 4)
+
+typedef struct {
+    int32_t N, size, start, end;
+    uint64_t full, can_down, can_up, can_right, can_left;
+    int8_t values[MAX_CELLS];
+    int8_t rows[MAX_CELLS], cols[MAX_CELLS];
+    int8_t nbrs[MAX_CELLS][4];
+    int8_t nnbrs[MAX_CELLS];
+    uint64_t nbr_mask[MAX_CELLS];
+    uint64_t ring_mask[MAX_CELLS];
+    int32_t positions[MAX_VALUE]; /* -1 if the number is not on the board */
+} board_t;
+
+typedef struct {
+    int32_t top, path_len;
+    int64_t checked, pruned_distance, pruned_connectivity;
+    int32_t cell[MAX_FRAMES], next[MAX_FRAMES], depth[MAX_FRAMES];
+    uint64_t visited[MAX_FRAMES];
+    int32_t path[MAX_CELLS];
+} search_t;
+
+static uint64_t expand(const board_t *b, uint64_t m)
+{
+    return ((m & b->can_down) << b->N) | ((m & b->can_up) >> b->N) |
+           ((m & b->can_right) << 1) | ((m & b->can_left) >> 1);
+}
+
+static uint64_t flood(const board_t *b, uint64_t seed, uint64_t free_)
+{
+    uint64_t reach = seed, front = seed;
+    while (front) {
+        front = expand(b, front) & free_ & ~reach;
+        reach |= front;
+    }
+    return reach;
+}
+
+/* Board.stays_connected */
+static int stays_connected(const board_t *b, int p, int h, uint64_t free_)
+{
+    uint64_t bit = 1ULL << h;
+    uint64_t open = free_ | bit;
+    uint64_t nbrs = b->nbr_mask[p] & open;
+    if (nbrs == bit)
+        return 1;
+    if ((flood(b, bit, b->ring_mask[p] & open) & nbrs) == nbrs)
+        return 1;
+    return (flood(b, bit, free_) & free_) == free_;
+}
+
+/* Runs until the stack is empty (returns 0), a solution is found (1, the
+ * path is in s->path) or s->checked reaches budget (2, s->path holds the
+ * last expanded path). */
+EXPORT int zip_search(const board_t *b, search_t *s, int64_t budget)
+{
+    while (s->top > 0) {
+        if (s->checked >= budget)
+            return 2;
+        s->top--;
+        int i = s->cell[s->top];
+        int next = s->next[s->top];
+        int d = s->depth[s->top];
+        uint64_t visited = s->visited[s->top];
+        uint64_t bit = 1ULL << i;
+        if (visited & bit)
+            continue;
+
+        s->checked++;
+        s->path[d] = i;
+        s->path_len = d + 1;
+
+        int value = b->values[i];
+        if (value == next) {
+            if (next == b->end) {
+                if ((visited | bit) == b->full)
+                    return 1;
+                continue;
+            }
+            next++;
+        } else if (value != 0) {
+            continue;
+        }
+
+        visited |= bit;
+        uint64_t free_ = b->full & ~visited;
+
+        int t = next < MAX_VALUE ? b->positions[next] : -1;
+        if (t >= 0) {
+            int dist = abs(b->rows[i] - b->rows[t]) + abs(b->cols[i] - b->cols[t]);
+            if (dist > popcount(free_)) {
+                s->pruned_distance++;
+                continue;
+            }
+        }
+        if (free_) {
+            int ok = d > 0 ? stays_connected(b, s->path[d - 1], i, free_)
+                           : (flood(b, bit, free_) & free_) == free_;
+            if (!ok) {
+                s->pruned_connectivity++;
+                continue;
+            }
+        }
+
+        for (int k = 0; k < b->nnbrs[i]; k++) {
+            int j = b->nbrs[i][k];
+            if (!(free_ >> j & 1))
+                continue;
+            s->cell[s->top] = j;
+            s->next[s->top] = next;
+            s->depth[s->top] = d + 1;
+            s->visited[s->top] = visited;
+            s->top++;
+        }
+    }
+    return 0;
+}
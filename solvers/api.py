@@ -0,0 +1,53 @@
+# library entry point: solve(grid, walls, engine="v4", options={...})
+#
+# Every engine module is imported the first time it is used, so importing
+# this one loads none of them (no ortools, no ctypes) and nothing imports
+# matplotlib unless something is drawn (solvers.utils). python -m
+# solvers.benchmark startup measures the import times. stream() gives the
+# v4 search's progress as it runs (solvers.stream).
+
+import importlib
+
+# engine name -> "module:function"; every function takes (grid, walls) and
+# the options below as keywords
+ENGINES = {
+    "v1": "solvers.zip_solver_v1:solve",
+    "v2": "solvers.zip_solver_v2:solve",
+    "v3": "solvers.zip_solver_v3:solve",
+    "v4": "solvers.zip_solver_v4:solve",
+    "parallel": "solvers.parallel:solve",
+    "kernel": "solvers.kernel:solve",
+    "segments": "solvers.zip_solver_segments:solve",
+    "bidir": "solvers.zip_solver_bidir:solve",
+    "dp": "solvers.zip_solver_dp:solve",
+    "sat": "solvers.zip_solver_sat:solve",
+    "count": "solvers.counting:count_solutions",
+}
+
+
+def get_engine(name):
+    """The solve function of an engine, importing its module."""
+    if name not in ENGINES:
+        raise ValueError(f"unknown engine: {name}")
+    module, function = ENGINES[name].split(":")
+    return getattr(importlib.import_module(module), function)
+
+
+def solve(grid, walls=(), engine="v4", options=None):
+    """Solves a puzzle with one of ENGINES. options are passed to the engine
+    as keywords: every engine takes stop_event, the others are its own (see
+    its module: rules, ordering, tt_mb, on_progress, workers, limit...).
+    Returns the engine's result dict, which always has "found", "solution"
+    (a list of (r, c) or None) and "checked"."""
+    result = get_engine(engine)(grid, list(walls), **(options or {}))
+    result.setdefault("found", result["solution"] is not None)
+    return result
+
+
+def stream(grid, walls=(), **options):
+    """The v4 search (or v2's / v3's with engine=) as an iterable of progress
+    events ending with the result, which can be cancelled and checkpointed
+    (see solvers.stream)."""
+    from solvers.stream import SolveStream
+
+    return SolveStream(grid, walls, **options)
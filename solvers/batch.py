@@ -0,0 +1,231 @@
+# batch solving: stream puzzles from JSONL files or a directory, solve them on
+# a pool of processes and write one JSON line per puzzle as each finishes
+#
+# A puzzle is a JSON object {"id": ..., "grid": [[...], ...], "walls":
+# [[[r, c], [r, c]], ...]} ("id" and "walls" are optional): one per line in
+# a .jsonl file, or the whole of a .json file; .zpz files (see
+# solvers.puzzles) are read too, puzzle ids being "file:index". Inputs
+# are read lazily and only a few puzzles per worker are in flight, so a file
+# of any size is never held in memory. Every puzzle gets its own timeout,
+# enforced through the engine's stop_event. Puzzles already in the solution
+# cache (solvers.cache) are answered from it, and new answers go into it.
+#
+# python -m solvers.batch INPUT [INPUT ...] [--out FILE] [--engine v4]
+#     [--workers K] [--timeout SECONDS] [--cache FILE | --no-cache]
+# INPUT is a .jsonl / .json / .zpz file, a directory of them, or - for stdin.
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import sys
+import threading
+import time
+
+from solvers import api, puzzles
+from solvers import cache as solution_cache
+
+# every api engine but parallel: pool workers cannot start processes of their own
+ENGINES = [name for name in api.ENGINES if name != "parallel"]
+
+
+def parse(text, default_id):
+    """(id, grid, walls) from a puzzle's JSON text; (id, None, error) if it
+    cannot be read."""
+    try:
+        return puzzles.decode(json.loads(text), default_id)
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        return default_id, None, f"{type(e).__name__}: {e}"
+
+
+def read_lines(f, name):
+    """Yields (id, grid, walls) for every puzzle line of an open file."""
+    for lineno, line in enumerate(f, 1):
+        if line.strip():
+            yield parse(line, f"{name}:{lineno}")
+
+
+def read_puzzles(sources, skip=None):
+    """Yields (id, grid, walls) from every source, one puzzle at a time.
+    grid is None (and walls the error) for a line that could not be read.
+    skip: a file to leave out of directories (the output file)."""
+    skip = os.path.realpath(skip) if skip else None
+    for source in sources:
+        if source == "-":
+            yield from read_lines(sys.stdin, "stdin")
+        elif os.path.isdir(source):
+            names = sorted(
+                n
+                for n in os.listdir(source)
+                if n.endswith((".json", ".jsonl", ".zpz"))
+            )
+            paths = [os.path.join(source, n) for n in names]
+            yield from read_puzzles(
+                [p for p in paths if os.path.realpath(p) != skip], skip
+            )
+        elif puzzles.is_binary(source):
+            with puzzles.PuzzleFile(source) as f:
+                for k, grid, walls in f:
+                    yield f"{source}:{k}", grid, walls
+        elif source.endswith(".json"):
+            with open(source) as f:
+                yield parse(f.read(), source)
+        else:
+            with open(source) as f:
+                yield from read_lines(f, source)
+
+
+# per process solution caches, by path
+_caches = {}
+
+
+def solve_one(task):
+    """Pool task: solves one puzzle within its timeout. Never raises."""
+    pid, grid, walls, engine, timeout, cache = task
+    record = {"id": pid, "status": "error", "path": None, "checked": 0, "time": 0.0}
+    if grid is None:
+        record["error"] = walls
+        return record
+    solutions = None
+    if cache and engine != "count":
+        solutions = _caches.setdefault(cache, solution_cache.SolutionCache(cache))
+        try:
+            hit = solutions.get(grid, walls)
+        except solution_cache.ERRORS:
+            hit = solutions = None
+        if hit is not None:
+            record["status"] = "solved" if hit["found"] else "no_solution"
+            record["path"] = hit["solution"]
+            record["cached"] = True
+            return record
+    stop_event = threading.Event()
+    timer = threading.Timer(timeout, stop_event.set) if timeout else None
+    if timer:
+        timer.start()
+    start = time.perf_counter()
+    try:
+        result = api.solve(grid, walls, engine, {"stop_event": stop_event})
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+        return record
+    finally:
+        record["time"] = time.perf_counter() - start
+        if timer:
+            timer.cancel()
+    if result["found"]:
+        record["status"] = "solved"
+    elif stop_event.is_set():
+        record["status"] = "timeout"
+    else:
+        record["status"] = "no_solution"
+    record["path"] = result["solution"]
+    record["checked"] = result["checked"]
+    if "count" in result:
+        record["count"] = result["count"]
+    if solutions is not None and record["status"] != "timeout":
+        try:
+            solutions.put(grid, walls, result["solution"])
+        except solution_cache.ERRORS:
+            pass
+    return record
+
+
+def solve_stream(
+    puzzles,
+    out,
+    engine="v4",
+    workers=None,
+    timeout=None,
+    cache=solution_cache.DEFAULT_PATH,
+):
+    """Solves (id, grid, walls) puzzles on `workers` processes and writes a
+    JSON line {"id", "status", "path", "checked", "time"[, "count",
+    "cached", "error"]} to the open file out as each one finishes. status is
+    solved, no_solution, timeout or error. cache is the solution cache file,
+    None for none. Returns {status: number of puzzles}; an error writing to
+    out stops the run and is raised."""
+    if engine not in ENGINES:
+        raise ValueError(f"unknown engine: {engine}")
+    workers = workers or os.cpu_count() or 1
+    # Pool.imap would read the whole input ahead; keep a few tasks per worker
+    slots = threading.BoundedSemaphore(2 * workers)
+    totals = {}
+    broken = []  # the error that stopped the writes to out, if any
+
+    # both run in the pool's result thread: if one raised, that thread would
+    # die with the slot still taken and the pool would never finish
+    def write(record):
+        try:
+            if not broken:
+                out.write(json.dumps(record) + "\n")
+                out.flush()
+                totals[record["status"]] = totals.get(record["status"], 0) + 1
+        except Exception as e:  # e.g. BrokenPipeError when piped into head
+            broken.append(e)
+        finally:
+            slots.release()
+
+    def failed(pid, e):
+        write({"id": pid, "status": "error", "error": f"{type(e).__name__}: {e}"})
+
+    with mp.get_context().Pool(workers) as pool:
+        for pid, grid, walls in puzzles:
+            slots.acquire()
+            if broken:
+                break
+            pool.apply_async(
+                solve_one,
+                ((pid, grid, walls, engine, timeout, cache),),
+                callback=write,
+                error_callback=lambda e, pid=pid: failed(pid, e),
+            )
+        if broken:
+            pool.terminate()
+        else:
+            pool.close()
+            pool.join()
+    if broken:
+        raise broken[0]
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve Zip puzzles in bulk.")
+    parser.add_argument("inputs", nargs="+", help=".jsonl/.json/.zpz files, dirs or -")
+    parser.add_argument("--out", default="-", help="output JSONL (default stdout)")
+    parser.add_argument("--engine", default="v4", choices=ENGINES)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--timeout", type=float, default=None, help="per puzzle, s")
+    parser.add_argument("--cache", default=solution_cache.DEFAULT_PATH)
+    parser.add_argument("--no-cache", dest="cache", action="store_const", const=None)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    out = sys.stdout if args.out == "-" else open(args.out, "w")
+    try:
+        totals = solve_stream(
+            read_puzzles(args.inputs, skip=None if args.out == "-" else args.out),
+            out,
+            args.engine,
+            args.workers,
+            args.timeout,
+            args.cache,
+        )
+    except BrokenPipeError:
+        # the reader went away (e.g. | head): stop quietly, and keep Python
+        # from failing again when it flushes stdout at exit
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - start
+    done = sum(totals.values())
+    print(
+        f"{done} puzzles in {elapsed:.2f}s ({done / elapsed:.1f}/s): {totals}",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+# times the v3 reference engine against v4 on every board in solvers.grids
+# v4-full: v3's rules with a full flood at every node, v4-v3: v3's rules,
+# v4: the default pruning rules (see solvers.pruning), v4-tt: v4 + failure memo,
+# v4-par: v4-tt split over one process per core (see solvers.parallel)
+# run from the repo root: python -m solvers.benchmark [engines|orderings|large]
+# (orderings compares the v4 move orderings, see solvers.ordering; large runs
+# v3, v4 and the CP-SAT engine on random 8x8 to 12x12 boards, 60s timeout;
+# memory [board] reports peak allocations and peak RSS, grid_4 by default;
+# kernel reports nodes/s of v3, v4 with v3's rules and the C kernel; startup
+# times imports in fresh interpreters, the cost of every spawned worker;
+# render times a GUI path update with and without blitting, off screen)
+
+import multiprocessing as mp
+import queue
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from solvers import api, generator, kernel
+from solvers.grids import boards
+from solvers.ordering import DEFAULT_ORDERING
+from solvers.ordering import ORDERINGS as MOVE_ORDERINGS
+from solvers.pruning import DEFAULT_RULES, V3_RULES
+
+
+def large_boards(sizes=range(8, 13)):
+    """Yields (name, grid, walls) for a random N x N puzzle of each size,
+    with N + 2 numbers (fixed seeds, so every run sees the same boards)."""
+    for N in sizes:
+        grid, walls, _ = generator.random_puzzle(N, N + 2, seed=N)
+        yield f"rand_{N}", grid, walls
+
+
+def run_v3(grid, walls, stop_event):
+    # the GUI script's reference engine; imported here so that importing the
+    # solvers package never pulls in the top-level grid_solver module
+    from grid_solver import solver_v3
+
+    q = queue.Queue()
+    solver_v3(grid, walls, q, stop_event, update_interval_checks=10**12)
+    msg = q.get()
+    return {"solution": msg.get("solution"), "checked": msg["checked"]}
+
+
+def run_engine(engine, **options):
+    """Runner for an engine of solvers.api with fixed options."""
+    return lambda grid, walls, stop_event: api.solve(
+        grid, walls, engine, dict(options, stop_event=stop_event)
+    )
+
+
+def run_v4(rules=DEFAULT_RULES, ordering=DEFAULT_ORDERING, tt_mb=0):
+    return run_engine(
+        "v4", rules=rules, ordering=ordering, tt_mb=tt_mb, progress_interval=10000
+    )
+
+
+run_parallel = run_engine("parallel", tt_mb=32)
+run_sat = run_engine("sat")
+run_dp = run_engine("dp")
+run_kernel = run_engine("kernel", progress_interval=10000)
+run_bidir = run_engine("bidir")
+run_segments = run_engine("segments", progress_interval=10000)
+
+
+ENGINES = {
+    "v3": run_v3,
+    "v4-full": run_v4(("distance", "full_flood")),
+    "v4-v3": run_v4(V3_RULES),
+    "v4": run_v4(DEFAULT_RULES),
+    "v4-tt": run_v4(DEFAULT_RULES, tt_mb=32),
+    "v4-par": run_parallel,
+    "dp": run_dp,
+    "segments": run_segments,
+    "bidir": run_bidir,
+}
+
+ORDERINGS = {name: run_v4(ordering=name) for name in MOVE_ORDERINGS}
+
+LARGE = {
+    "v3": run_v3,
+    "v4-tt": run_v4(DEFAULT_RULES, tt_mb=32),
+    "sat": run_sat,
+    "dp": run_dp,
+}
+
+MEMORY = ("v3", "v4-v3", "v4")
+
+# all three search the same nodes in the same order
+KERNEL = {"v3": run_v3, "python": run_v4(V3_RULES), "kernel": run_kernel}
+
+# what a fresh interpreter runs for the startup benchmark
+STARTUP = {
+    "python": "pass",
+    "api": "import solvers.api",
+    "api v4": "from solvers import api; api.solve([[1, 2]], [], 'v4')",
+    "batch": "import solvers.batch",
+    "grid_solver": "import grid_solver",
+    "benchmark": "import solvers.benchmark",
+    "matplotlib": "import matplotlib.pyplot",
+}
+
+
+def compare(runs, label, board_list=None, timeout=None):
+    """Runs every entry of runs on every board, the first one is the baseline.
+    A run still going after timeout seconds is stopped through its stop_event."""
+    print(f"{'board':<8} {label:<10} {'time (s)':>9} {'checked':>9} {'speedup':>8}")
+    for name, grid, walls in board_list or boards():
+        base = None
+        for run_name, run in runs.items():
+            stop_event = mp.Event()
+            timer = threading.Timer(timeout, stop_event.set) if timeout else None
+            if timer:
+                timer.start()
+            start = time.perf_counter()
+            result = run(grid, walls, stop_event)
+            elapsed = time.perf_counter() - start
+            if timer:
+                timer.cancel()
+            base = base or elapsed
+            note = ""
+            if not result["solution"]:
+                note = "  (timeout)" if stop_event.is_set() else "  (no solution)"
+            print(
+                f"{name:<8} {run_name:<10} {elapsed:>9.3f} {result['checked']:>9} "
+                f"{base / elapsed:>7.1f}x" + note
+            )
+            if result.get("pruned"):
+                print(" " * 20, "pruned:", result["pruned"])
+            if result.get("tt"):
+                print(" " * 20, "memo:", result["tt"])
+            if "count" in result:
+                print(" " * 20, "solutions:", result["count"])
+
+
+def measure(engine, board, traced, results):
+    """Child process for memory(): solves the board with ENGINES[engine] and
+    puts either the tracemalloc peak (traced=True) or the growth of the peak
+    RSS (in KiB, None without the resource module) on results, then the
+    solve time and the checked count."""
+    grid, walls = getattr(grids, board), getattr(grids, "walls_" + board[5:], [])
+    if traced:
+        tracemalloc.start()
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None
+    start = time.perf_counter()
+    result = ENGINES[engine](grid, walls, mp.Event())
+    elapsed = time.perf_counter() - start
+    if traced:
+        results.put(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    elif resource:
+        results.put(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss)
+    else:
+        results.put(None)
+    results.put(elapsed)
+    results.put(result["checked"])
+
+
+def memory(board="grid_4"):
+    """Peak Python allocations and peak RSS growth of each MEMORY engine,
+    every run in a fresh process (time is from the run without tracemalloc)."""
+    print(
+        f"{'board':<8} {'engine':<10} {'time (s)':>9} {'checked':>9} "
+        f"{'peak alloc':>11} {'peak rss':>10}"
+    )
+    ctx = mp.get_context()
+    for engine in MEMORY:
+        row = []
+        for traced in (True, False):
+            results = ctx.Queue()
+            p = ctx.Process(target=measure, args=(engine, board, traced, results))
+            p.start()
+            row.append(results.get())
+            elapsed = results.get()
+            checked = results.get()
+            p.join()
+        peak, rss = row
+        rss = f"{rss / 1024:>7.1f} MB" if rss is not None else f"{'n/a':>10}"
+        print(
+            f"{board:<8} {engine:<10} {elapsed:>9.3f} {checked:>9} "
+            f"{peak / 2**20:>8.2f} MB {rss}"
+        )
+
+
+def nodes_per_second(board_list=None):
+    """Nodes per second of v3, its pure-Python twin in v4 and the compiled
+    kernel (python -m solvers.kernel builds it)."""
+    if kernel.load() is None:
+        print("kernel not built (python -m solvers.kernel), it falls back to python")
+    print(f"{'board':<8} {'engine':<10} {'time (s)':>9} {'checked':>9} {'nodes/s':>12}")
+    for name, grid, walls in board_list or boards():
+        for run_name, run in KERNEL.items():
+            start = time.perf_counter()
+            result = run(grid, walls, mp.Event())
+            elapsed = time.perf_counter() - start
+            rate = result["checked"] / elapsed
+            print(
+                f"{name:<8} {run_name:<10} {elapsed:>9.3f} {result['checked']:>9} "
+                f"{rate:>12,.0f}"
+            )
+
+
+def startup(repeat=5):
+    """Best of repeat wall times of a fresh interpreter running each STARTUP
+    snippet, and whether it ended up importing matplotlib."""
+    print(f"{'import':<12} {'time (ms)':>10} {'matplotlib':>11}")
+    report = "; import sys; print('matplotlib' in sys.modules)"
+    for name, code in STARTUP.items():
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            out = subprocess.run(
+                [sys.executable, "-c", code + report],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            times.append(time.perf_counter() - start)
+        print(f"{name:<12} {min(times) * 1000:>10.1f} {out.strip():>11}")
+
+
+def render(board="grid_4", frames=100):
+    """Milliseconds per GUI frame showing growing prefixes of the board's
+    solution: the annotate renderer with a full redraw, and blitting."""
+    import matplotlib
+
+    matplotlib.use("Agg")
+    from grid_solver import GridSolverGUI
+
+    grid = getattr(grids, board)
+    walls = getattr(grids, "walls_" + board[5:], [])
+    path = api.solve(grid, walls)["solution"]
+    prefixes = [path[: 2 + k % (len(path) - 1)] for k in range(frames)]
+    print(f"{board}: {len(path)} cells, {frames} frames")
+    for blit in (False, True):
+        gui = GridSolverGUI(len(grid), grid=grid, walls=walls, blit=blit)
+        gui.fig.canvas.draw()  # the background
+        start = time.perf_counter()
+        for prefix in prefixes:
+            gui.show_path(prefix, temp=True)
+            if blit:
+                gui.refresh()
+            else:
+                gui.fig.canvas.draw()  # what draw_idle costs once it runs
+        elapsed = time.perf_counter() - start
+        name = "blit" if blit else "annotate"
+        print(f"{name:<9} {elapsed / frames * 1000:>8.2f} ms/frame")
+
+
+def main():
+    what = sys.argv[1] if len(sys.argv) > 1 else "engines"
+    if what == "engines":
+        compare(ENGINES, "engine")
+    elif what == "orderings":
+        compare(ORDERINGS, "ordering")
+    elif what == "large":
+        compare(LARGE, "engine", large_boards(), timeout=60)
+    elif what == "memory":
+        memory(*sys.argv[2:3])
+    elif what == "kernel":
+        nodes_per_second()
+    elif what == "startup":
+        startup()
+    elif what == "render":
+        render(*sys.argv[2:3])
+    else:
+        sys.exit(
+            "usage: python -m solvers.benchmark "
+            "[engines|orderings|large|memory [board]|kernel|startup|render [board]]"
+        )
+
+
+if __name__ == "__main__":
+    main()
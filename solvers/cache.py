@@ -0,0 +1,201 @@
+# on-disk solution cache, shared by the GUI and batch runs
+#
+# A puzzle and its 7 rotations / reflections have the same solutions moved
+# by the same symmetry, so entries are keyed by a hash of the canonical form:
+# the smallest of the 8 transformed (N, grid, walls) tuples. The path is
+# stored in canonical coordinates and mapped back to the board it was asked
+# for. Puzzles without a solution are cached too (path NULL).
+#
+# The store is one SQLite file: SQLite's file locking makes it safe to share
+# between processes, and every process (pool workers included) opens its own
+# connection. Each lookup marks its entry as used; once there are more than
+# max_entries, the least recently used ones are deleted. Hit / miss counters
+# are kept per SolutionCache and, summed over every run, in the file itself.
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+DEFAULT_PATH = os.environ.get(
+    "ZIP_SOLVER_CACHE",
+    os.path.join(os.path.expanduser("~"), ".cache", "zip-solver", "solutions.sqlite"),
+)
+
+# what a cache that cannot be opened or written raises
+ERRORS = (OSError, sqlite3.Error)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS solutions (key TEXT PRIMARY KEY, path TEXT, used REAL);
+CREATE INDEX IF NOT EXISTS solutions_used ON solutions (used);
+CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER);
+"""
+
+
+def symmetries(N):
+    """The 8 maps (r, c) -> (r, c) of the N x N square: 4 rotations, each
+    with and without a mirror."""
+    m = N - 1
+    return [
+        lambda r, c: (r, c),
+        lambda r, c: (c, m - r),
+        lambda r, c: (m - r, m - c),
+        lambda r, c: (m - c, r),
+        lambda r, c: (r, m - c),
+        lambda r, c: (c, r),
+        lambda r, c: (m - r, c),
+        lambda r, c: (m - c, m - r),
+    ]
+
+
+def transform(grid, walls, t):
+    """(grid, walls) moved by t, walls as sorted cell pairs."""
+    N = len(grid)
+    moved = [[0] * N for _ in range(N)]
+    for r in range(N):
+        for c in range(N):
+            nr, nc = t(r, c)
+            moved[nr][nc] = grid[r][c]
+    walls = sorted({tuple(sorted((t(*a), t(*b)))) for a, b in walls})
+    return moved, walls
+
+
+def canonical(grid, walls):
+    """(key, t): the cache key of the puzzle and the symmetry t that takes
+    it to its canonical form."""
+    N = len(grid)
+    best = None
+    for t in symmetries(N):
+        moved, moved_walls = transform(grid, walls, t)
+        form = (N, tuple(map(tuple, moved)), tuple(moved_walls))
+        if best is None or form < best[0]:
+            best = form, t
+    form, t = best
+    return hashlib.sha256(repr(form).encode()).hexdigest(), t
+
+
+class SolutionCache:
+    """get / put solutions by puzzle; see the module comment."""
+
+    def __init__(self, path=DEFAULT_PATH, max_entries=100000):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = self.misses = self.stores = self.evictions = 0
+        self._conn = None
+        self._pid = None
+
+    def _db(self):
+        # a connection must not cross a fork: reopen in every new process
+        if self._conn is None or self._pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            self._pid = os.getpid()
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def _count(self, db, name, n=1):
+        db.execute(
+            "INSERT INTO counters VALUES (?, ?) "
+            "ON CONFLICT (name) DO UPDATE SET value = value + excluded.value",
+            (name, n),
+        )
+
+    def get(self, grid, walls):
+        """None if the puzzle is not cached, else {"found", "solution"} with
+        the solution in the puzzle's own coordinates."""
+        key, t = canonical(grid, walls)
+        db = self._db()
+        with db:
+            db.execute("BEGIN IMMEDIATE")
+            row = db.execute(
+                "SELECT path FROM solutions WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                self._count(db, "misses")
+                return None
+            db.execute(
+                "UPDATE solutions SET used = ? WHERE key = ?", (time.time(), key)
+            )
+            self.hits += 1
+            self._count(db, "hits")
+        if row[0] is None:
+            return {"found": False, "solution": None}
+        # the inverse of t, as a lookup table
+        N = len(grid)
+        back = {t(r, c): (r, c) for r in range(N) for c in range(N)}
+        return {"found": True, "solution": [back[tuple(p)] for p in json.loads(row[0])]}
+
+    def put(self, grid, walls, solution):
+        """Stores the solution (a list of cells), or None for no solution.
+        Only results of searches that ran to the end belong here."""
+        key, t = canonical(grid, walls)
+        path = json.dumps([t(r, c) for r, c in solution]) if solution else None
+        db = self._db()
+        with db:
+            db.execute("BEGIN IMMEDIATE")
+            db.execute(
+                "INSERT OR REPLACE INTO solutions VALUES (?, ?, ?)",
+                (key, path, time.time()),
+            )
+            self.stores += 1
+            size = db.execute("SELECT COUNT(*) FROM solutions").fetchone()[0]
+            if size > self.max_entries:
+                evicted = size - self.max_entries
+                db.execute(
+                    "DELETE FROM solutions WHERE key IN "
+                    "(SELECT key FROM solutions ORDER BY used LIMIT ?)",
+                    (evicted,),
+                )
+                self.evictions += evicted
+                self._count(db, "evictions", evicted)
+
+    def __len__(self):
+        return self._db().execute("SELECT COUNT(*) FROM solutions").fetchone()[0]
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "size": len(self),
+        }
+
+    def totals(self):
+        """Hits, misses and evictions of every run on this file."""
+        rows = self._db().execute("SELECT name, value FROM counters").fetchall()
+        return {"hits": 0, "misses": 0, "evictions": 0, **dict(rows)}
+
+    def clear(self):
+        db = self._db()
+        with db:
+            db.execute("BEGIN IMMEDIATE")
+            db.execute("DELETE FROM solutions")
+            db.execute("DELETE FROM counters")
+
+    def close(self):
+        if self._conn is not None and self._pid == os.getpid():
+            self._conn.close()
+        self._conn = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show or clear the solution cache.")
+    parser.add_argument("path", nargs="?", default=DEFAULT_PATH)
+    parser.add_argument("--clear", action="store_true")
+    args = parser.parse_args()
+
+    cache = SolutionCache(args.path)
+    if args.clear:
+        cache.clear()
+    print(cache.path, {"size": len(cache), **cache.totals()})
+
+
+if __name__ == "__main__":
+    main()
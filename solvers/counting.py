@@ -0,0 +1,254 @@
+# solution counting on the v4 engine: the same nodes, pruning rules and move
+# ordering as zip_solver_v4.search, but the search goes on after a solution
+#
+# A state (head + visited cells) always has the same number of completions,
+# so with a memo every subtree is counted once and later visits add its stored
+# count, zero for dead ends. Counts are only stored for subtrees that were
+# searched to the end, never for ones cut short by the limit or a stop.
+# In parallel mode the tree is split at split_depth like solvers.parallel and
+# every subtree is counted on a pool of processes.
+
+import multiprocessing as mp
+import os
+import time
+
+from solvers import ordering as ordering_
+from solvers import pruning
+from solvers.ordering import DEFAULT_ORDERING
+from solvers.pruning import DEFAULT_RULES
+from solvers.transposition import TranspositionTable
+from solvers.zip_solver_v4 import Board, search, unroll
+
+
+class Counter:
+    """Counts the completions of v4 frames on one board."""
+
+    def __init__(
+        self,
+        board,
+        rules=DEFAULT_RULES,
+        ordering=DEFAULT_ORDERING,
+        tt_mb=32,
+        limit=None,
+        stop_event=None,
+    ):
+        self.board = board
+        self.rules = pruning.get_rules(rules)
+        self.order = ordering_.get_ordering(ordering)
+        self.tt = TranspositionTable(tt_mb) if tt_mb else None
+        self.limit = limit
+        self.stop_event = stop_event
+        self.reset()
+
+    def reset(self):
+        """Start a new count, keeping the memo."""
+        self.found = 0
+        self.solution = None
+        self.checked = 0
+        self.pruned = {name: 0 for name, _ in self.rules}
+        self.stopped = False
+
+    def done(self):
+        return self.stopped or self.limit is not None and self.found >= self.limit
+
+    def count(self, frame):
+        """Solutions below a (cell, next_search, path, visited) frame. The
+        result is exact unless done() is True afterwards."""
+        board = self.board
+        stack = [frame]
+        # running count of every state being expanded, innermost last; the
+        # first entry collects the frame's own count
+        totals = [0]
+        while stack and not self.done():
+            i, next_search, path, visited = stack.pop()
+            if i < 0:
+                # exit marker (-1, key, depth, 0): the state's children are
+                # all counted, so its total is final
+                total = totals.pop()
+                if self.tt is not None:
+                    self.tt.store(next_search, path, total)
+                totals[-1] += total
+                continue
+            bit = 1 << i
+            if visited & bit:
+                continue
+
+            self.checked += 1
+            if self.checked % 10000 == 0 and self.stop_event is not None:
+                self.stopped = self.stop_event.is_set()
+
+            new_next = next_search
+            cell_val = board.values[i]
+            if cell_val == next_search:
+                if next_search == board.end:
+                    if visited | bit == board.full:
+                        self.found += 1
+                        if self.solution is None:
+                            self.solution = unroll((i, path))
+                        totals[-1] += 1
+                    continue
+                new_next += 1
+            elif cell_val != 0:
+                continue
+
+            new_visited = visited | bit
+            free = board.full & ~new_visited
+            parent = path[0] if path is not None else None
+            for name, rule in self.rules:
+                if not rule(board, parent, i, new_next, new_visited, free):
+                    self.pruned[name] += 1
+                    break
+            else:
+                key = new_visited * board.size + i
+                if self.tt is not None:
+                    stored = self.tt.get(key)
+                    if stored is not None:
+                        self.found += stored
+                        totals[-1] += stored
+                        continue
+
+                children = [j for j in board.neighbors[i] if free >> j & 1]
+                if self.order is not None and len(children) > 1:
+                    children = self.order(board, children, new_next, free)
+                totals.append(0)
+                stack.append((-1, key, new_visited.bit_count(), 0))
+                new_path = (i, path)
+                # the preferred move is pushed last, so it is counted first
+                for j in children:
+                    stack.append((j, new_next, new_path, new_visited))
+        return sum(totals)
+
+    def result(self):
+        result = {
+            "count": self.found,
+            "solution": self.board.to_cells(self.solution) if self.solution else None,
+            "checked": self.checked,
+            "pruned": self.pruned,
+        }
+        if self.tt is not None:
+            result["tt"] = self.tt.stats()
+        return result
+
+
+# per process state of the pool workers
+_worker = {}
+
+
+def _init_worker(grid, walls, options, stop_event):
+    # one counter per process, so its memo is shared by all of its tasks
+    _worker["counter"] = Counter(Board(grid, walls), stop_event=stop_event, **options)
+
+
+def _count_task(frame):
+    counter = _worker["counter"]
+    counter.reset()
+    before = counter.tt.stats() if counter.tt is not None else {}
+    counter.count(frame)
+    result = counter.result()
+    if before:
+        result["tt"] = {k: v - before[k] for k, v in result["tt"].items()}
+    return result, counter.stopped
+
+
+def count_solutions(
+    grid,
+    walls,
+    limit=None,
+    rules=DEFAULT_RULES,
+    ordering=DEFAULT_ORDERING,
+    tt_mb=32,
+    workers=1,
+    split_depth=8,
+    stop_event=None,
+):
+    """Counts the solutions, stopping once limit of them are found (limit=2
+    is a uniqueness check). workers > 1 counts the subtrees below split_depth
+    on that many processes, each with its own memo of tt_mb; stop_event then
+    has to be a multiprocessing.Event.
+    Returns {"count", "complete", "unique", "solution", "checked", "pruned",
+    "time"[, "tt"]}: complete is False if the count stopped early, unique is
+    None when the count cannot tell."""
+    started = time.perf_counter()
+    board = Board(grid, walls)
+    options = dict(rules=rules, ordering=ordering, tt_mb=tt_mb, limit=limit)
+    result = {"count": 0, "solution": None, "checked": 0, "pruned": {}}
+    stopped = False
+
+    if board.start is not None and pruning.feasible(board):
+        root = (board.positions[board.start], board.start, None, 0)
+        frontier = []
+        if workers > 1 and board.size > split_depth:
+            solution, checked, pruned = search(
+                board,
+                [root],
+                rules=rules,
+                ordering=ordering,
+                split_depth=split_depth,
+                frontier=frontier,
+            )
+            if solution is not None:
+                # the whole path is shorter than split_depth: count it serially
+                frontier = []
+        if frontier:
+            result.update(checked=checked, pruned=pruned)
+            stopped = count_parallel(
+                grid, walls, frontier, workers, options, stop_event, result
+            )
+        else:
+            counter = Counter(board, stop_event=stop_event, **options)
+            counter.count(root)
+            result.update(counter.result())
+            stopped = counter.stopped
+
+    count = result["count"]
+    complete = not stopped and (limit is None or count < limit)
+    result["complete"] = complete
+    if count >= 2:
+        result["unique"] = False
+    else:
+        result["unique"] = count == 1 if complete else None
+    result["time"] = time.perf_counter() - started
+    return result
+
+
+def count_parallel(grid, walls, frontier, workers, options, stop_event, result):
+    """Counts the frontier frames on a pool and adds them up in result.
+    stop_event has to be a multiprocessing.Event (the workers watch it).
+    Returns True if the count was stopped by it."""
+    workers = workers or os.cpu_count() or 1
+    limit = options["limit"]
+    ctx = mp.get_context()
+    stop = stop_event if stop_event is not None else ctx.Event()
+    stopped = False
+    tt_stats = {}
+    with ctx.Pool(workers, _init_worker, (grid, walls, options, stop)) as pool:
+        # preferred moves first, like the search would take them
+        for part, part_stopped in pool.imap_unordered(_count_task, reversed(frontier)):
+            result["count"] += part["count"]
+            result["checked"] += part["checked"]
+            if result["solution"] is None:
+                result["solution"] = part["solution"]
+            for name, n in part["pruned"].items():
+                result["pruned"][name] = result["pruned"].get(name, 0) + n
+            for name, n in part.get("tt", {}).items():
+                tt_stats[name] = tt_stats.get(name, 0) + n
+            stopped = stopped or part_stopped or stop.is_set()
+            if stopped or limit is not None and result["count"] >= limit:
+                pool.terminate()
+                break
+    if tt_stats:
+        result["tt"] = tt_stats
+    return stopped
+
+
+def is_unique(grid, walls, **options):
+    """True if the puzzle has exactly one solution."""
+    return count_solutions(grid, walls, limit=2, **options)["count"] == 1
+
+
+if __name__ == "__main__":
+    from solvers.grids import grid, walls
+
+    result = count_solutions(grid, walls)
+    print("Solutions:", result["count"], "in", round(result["time"], 3), "s")
+    print("Nodes:", result["checked"], "pruned:", result["pruned"])
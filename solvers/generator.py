@@ -0,0 +1,166 @@
+# random puzzles: a random Hamiltonian path with numbers placed along it
+#
+# unique_puzzle() numbers every cell of the path, optionally adds walls on
+# edges the path does not use, then drops numbers in random order as long as
+# the puzzle keeps exactly one solution (solvers.counting with limit=2).
+# python -m solvers.generator SIZE [SIZE ...] makes batches of those in the
+# grids.py format (or a .zpz / .jsonl puzzle file, see solvers.puzzles) and
+# reports puzzles per second for each size.
+
+import argparse
+import multiprocessing as mp
+import random
+import sys
+import time
+
+from solvers import puzzles as puzzle_files
+from solvers.counting import is_unique
+
+
+def random_path(N, rng=random, moves=None):
+    """Random Hamiltonian path on an N x N grid (no walls), by backbite moves
+    starting from a snake. moves defaults to 10 * N * N."""
+    path = [(r, c if r % 2 == 0 else N - 1 - c) for r in range(N) for c in range(N)]
+    for _ in range(moves if moves is not None else 10 * N * N):
+        if rng.random() < 0.5:
+            path.reverse()
+        r, c = path[-1]
+        nr, nc = rng.choice([(r + 1, c), (r - 1, c), (r, c + 1), (r, c - 1)])
+        if not (0 <= nr < N and 0 <= nc < N) or (nr, nc) == path[-2]:
+            continue
+        # joining the end to (nr, nc) closes a loop; reverse it to get a new path
+        k = path.index((nr, nc))
+        path[k + 1 :] = reversed(path[k + 1 :])
+    return path
+
+
+def puzzle_from_path(path, waypoints):
+    """Grid with 1..waypoints on path: first cell, last cell and evenly spaced
+    cells in between."""
+    N = int(len(path) ** 0.5)
+    grid = [[0] * N for _ in range(N)]
+    waypoints = max(2, min(waypoints, len(path)))
+    for k in range(waypoints):
+        r, c = path[round(k * (len(path) - 1) / (waypoints - 1))]
+        grid[r][c] = k + 1
+    return grid
+
+
+def random_puzzle(N, waypoints, seed=None):
+    """(grid, walls, path) for a random N x N puzzle without walls."""
+    rng = random.Random(seed)
+    path = random_path(N, rng)
+    return puzzle_from_path(path, waypoints), [], path
+
+
+def random_walls(N, path, count, rng=random):
+    """count walls on edges the path does not use, so it stays a solution."""
+    used = {frozenset(step) for step in zip(path, path[1:])}
+    edges = [
+        ((r, c), (r + dr, c + dc))
+        for r in range(N)
+        for c in range(N)
+        for dr, dc in [(0, 1), (1, 0)]
+        if r + dr < N and c + dc < N
+    ]
+    edges = [e for e in edges if frozenset(e) not in used]
+    return rng.sample(edges, min(count, len(edges)))
+
+
+def numbered(path, steps):
+    """Grid with 1..len(steps) on the path cells at the given (sorted) steps."""
+    N = int(len(path) ** 0.5)
+    grid = [[0] * N for _ in range(N)]
+    for k, step in enumerate(steps):
+        r, c = path[step]
+        grid[r][c] = k + 1
+    return grid
+
+
+def unique_puzzle(N, walls=0, seed=None, min_waypoints=2):
+    """(grid, walls, path) for a random N x N puzzle whose only solution is
+    path, with `walls` walls and as few numbers as the uniqueness check
+    allows (but at least min_waypoints)."""
+    rng = random.Random(seed)
+    path = random_path(N, rng)
+    wall_list = random_walls(N, path, walls, rng)
+    steps = list(range(len(path)))
+    candidates = steps[1:-1]
+    rng.shuffle(candidates)
+    for step in candidates:
+        if len(steps) <= min_waypoints:
+            break
+        trial = [s for s in steps if s != step]
+        if is_unique(numbered(path, trial), wall_list):
+            steps = trial
+    return numbered(path, steps), wall_list, path
+
+
+def _unique_task(args):
+    return unique_puzzle(*args)
+
+
+def generate(N, count, walls=0, seed=0, workers=None):
+    """count unique puzzles from seeds seed .. seed + count - 1 (so a batch is
+    reproducible), made on `workers` processes (default: all cores)."""
+    tasks = [(N, walls, seed + k) for k in range(count)]
+    if workers == 1:
+        return [_unique_task(t) for t in tasks]
+    with mp.get_context().Pool(workers) as pool:
+        return pool.map(_unique_task, tasks)
+
+
+def to_source(puzzles, first=1):
+    """Python source defining grid_<k> (and walls_<k> if any) for every
+    (grid, walls, path) in puzzles, like solvers/grids.py."""
+    lines = []
+    for k, (grid, walls, _) in enumerate(puzzles, first):
+        lines.append(f"grid_{k} = [")
+        lines.extend(f"    {row}," for row in grid)
+        lines.append("]")
+        lines.append("")
+        if walls:
+            lines.append(f"walls_{k} = [")
+            lines.extend(f"    {w}," for w in walls)
+            lines.append("]")
+            lines.append("")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate unique Zip puzzles.")
+    parser.add_argument("sizes", type=int, nargs="+", help="board sizes N")
+    parser.add_argument("--count", type=int, default=10, help="puzzles per size")
+    parser.add_argument("--walls", type=int, default=0, help="walls per puzzle")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument(
+        "--out", help="write the puzzles here (.zpz, .jsonl, else grids.py format)"
+    )
+    args = parser.parse_args()
+
+    puzzles = []
+    for N in args.sizes:
+        start = time.perf_counter()
+        batch = generate(N, args.count, args.walls, args.seed, args.workers)
+        elapsed = time.perf_counter() - start
+        numbers = sum(max(max(row) for row in grid) for grid, _, _ in batch)
+        print(
+            f"{N}x{N}: {len(batch)} puzzles in {elapsed:.2f}s "
+            f"({len(batch) / elapsed:.1f} puzzles/s, "
+            f"{numbers / len(batch):.1f} numbers on average)",
+            file=sys.stderr,
+        )
+        puzzles += batch
+
+    if args.out and args.out.endswith((".zpz", ".jsonl")):
+        puzzle_files.save(
+            args.out, [(k, grid, walls) for k, (grid, walls, _) in enumerate(puzzles)]
+        )
+    elif args.out:
+        with open(args.out, "w") as f:
+            f.write(to_source(puzzles))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,9 @@
+import sys
+
 import matplotlib.pyplot as plt
 
+from solvers import puzzles
+
 
 class GridEditor:
     def __init__(self, N):
@@ -133,3 +137,8 @@ if __name__ == "__main__":
     for w in walls:
         print(f"    {w},")
     print("]")
+
+    # python -m solvers.grid_maker FILE also adds the puzzle to a .zpz / .jsonl
+    if len(sys.argv) > 1:
+        puzzles.save(sys.argv[1], [(None, grid, walls)], append=True)
+        print(f"Saved to {sys.argv[1]}")
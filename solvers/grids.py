@@ -1,3 +1,5 @@
+# puzzles the benchmarks run on (python -m solvers.suite times every engine)
+
 grid_1 = [
     [0, 0, 0, 5, 0, 0],
     [0, 0, 0, 0, 0, 0],
@@ -5,7 +7,7 @@ grid_1 = [
     [0, 0, 0, 0, 0, 0],
     [0, 3, 0, 0, 8, 0],
     [0, 0, 1, 0, 0, 0],
-]  # v1: ~1.6s, v2: ~0.62s, v3: ~0.61s
+]
 
 grid_2 = [
     [7, 0, 1, 2, 0, 3, 0],
@@ -15,7 +17,7 @@ grid_2 = [
     [0, 0, 0, 0, 0, 0, 0],
     [0, 0, 0, 6, 0, 0, 0],
     [8, 0, 0, 0, 0, 0, 0],
-]  # v1: ~75s, v2: ~32s, v3: ~2s
+]
 
 grid_3 = [
     [1, 5, 0, 6, 0, 0, 0],
@@ -25,7 +27,7 @@ grid_3 = [
     [0, 0, 0, 0, 0, 0, 0],
     [11, 0, 10, 0, 0, 0, 0],
     [0, 12, 0, 0, 0, 13, 14],
-]  # v1: ~1.9s, v2: ~0.9s, v3: ~1s
+]
 
 grid_4 = [
     [1, 0, 0, 0, 0, 0, 0, 0],
@@ -36,7 +38,7 @@ grid_4 = [
     [0, 0, 9, 10, 0, 0, 5, 0],
     [0, 0, 0, 0, 8, 0, 0, 7],
     [0, 12, 0, 0, 0, 0, 0, 0],
-]  # v1, v2: LONG TIME!!! v3: 4s!!!!
+]
 
 path_4 = [
     (0, 0),
@@ -176,3 +178,12 @@ no_walls = []
 
 grid = grid_8
 walls = no_walls
+
+
+def boards():
+    """Yields (name, grid, walls) for every grid_<k> above."""
+    for name in sorted(globals()):
+        if not name.startswith("grid_"):
+            continue
+        suffix = name[len("grid_") :]
+        yield name, globals()[name], globals().get(f"walls_{suffix}", [])
@@ -0,0 +1,178 @@
+# optional C kernel for the search loop (solvers/_kernel.c)
+#
+# python -m solvers.kernel compiles it with the system C compiler ($CC, or cc)
+# into solvers/_kernel.so (_kernel.dll on Windows). Without it, or on boards
+# bigger than 8x8, solve() runs the same search in pure Python: zip_solver_v4
+# with v3's rules. Either way the nodes checked, their order and the solution
+# are the same as v3's.
+
+import ctypes
+import os
+import subprocess
+import sys
+
+from solvers.pruning import V3_RULES
+from solvers.zip_solver_v4 import Board
+from solvers.zip_solver_v4 import solve as solve_v4
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SOURCE = os.path.join(HERE, "_kernel.c")
+LIBRARY = os.path.join(HERE, "_kernel.dll" if sys.platform == "win32" else "_kernel.so")
+
+# must match _kernel.c
+MAX_CELLS = 64
+MAX_VALUE = 128
+MAX_FRAMES = 4 * MAX_CELLS + 4
+
+
+class CBoard(ctypes.Structure):
+    _fields_ = [
+        ("N", ctypes.c_int32),
+        ("size", ctypes.c_int32),
+        ("start", ctypes.c_int32),
+        ("end", ctypes.c_int32),
+        ("full", ctypes.c_uint64),
+        ("can_down", ctypes.c_uint64),
+        ("can_up", ctypes.c_uint64),
+        ("can_right", ctypes.c_uint64),
+        ("can_left", ctypes.c_uint64),
+        ("values", ctypes.c_int8 * MAX_CELLS),
+        ("rows", ctypes.c_int8 * MAX_CELLS),
+        ("cols", ctypes.c_int8 * MAX_CELLS),
+        ("nbrs", (ctypes.c_int8 * 4) * MAX_CELLS),
+        ("nnbrs", ctypes.c_int8 * MAX_CELLS),
+        ("nbr_mask", ctypes.c_uint64 * MAX_CELLS),
+        ("ring_mask", ctypes.c_uint64 * MAX_CELLS),
+        ("positions", ctypes.c_int32 * MAX_VALUE),
+    ]
+
+
+class CSearch(ctypes.Structure):
+    _fields_ = [
+        ("top", ctypes.c_int32),
+        ("path_len", ctypes.c_int32),
+        ("checked", ctypes.c_int64),
+        ("pruned_distance", ctypes.c_int64),
+        ("pruned_connectivity", ctypes.c_int64),
+        ("cell", ctypes.c_int32 * MAX_FRAMES),
+        ("next", ctypes.c_int32 * MAX_FRAMES),
+        ("depth", ctypes.c_int32 * MAX_FRAMES),
+        ("visited", ctypes.c_uint64 * MAX_FRAMES),
+        ("path", ctypes.c_int32 * MAX_CELLS),
+    ]
+
+
+_lib = None
+
+
+def load():
+    """The compiled kernel, or None if it has not been built."""
+    global _lib
+    if _lib is None and os.path.exists(LIBRARY):
+        try:
+            lib = ctypes.CDLL(LIBRARY)
+        except OSError:
+            return None
+        lib.zip_search.argtypes = [
+            ctypes.POINTER(CBoard),
+            ctypes.POINTER(CSearch),
+            ctypes.c_int64,
+        ]
+        lib.zip_search.restype = ctypes.c_int
+        _lib = lib
+    return _lib
+
+
+def build(cc=None):
+    cc = cc or os.environ.get("CC", "cc")
+    cmd = [cc, "-O3", "-shared", "-o", LIBRARY, SOURCE]
+    if sys.platform != "win32":
+        cmd.insert(2, "-fPIC")
+    subprocess.run(cmd, check=True)
+
+
+def supported(board):
+    return (
+        board.start is not None
+        and board.size <= MAX_CELLS
+        and all(0 <= v < MAX_VALUE for v in board.values)
+    )
+
+
+def to_c(board):
+    """CBoard with the flat arrays of a Board."""
+    cb = CBoard()
+    cb.N, cb.size = board.N, board.size
+    cb.start, cb.end = board.start, board.end
+    cb.full = board.full
+    cb.can_down, cb.can_up = board.can_down, board.can_up
+    cb.can_right, cb.can_left = board.can_right, board.can_left
+    for i in range(board.size):
+        cb.values[i] = board.values[i]
+        cb.rows[i], cb.cols[i] = board.rows[i], board.cols[i]
+        cb.nnbrs[i] = len(board.neighbors[i])
+        for k, j in enumerate(board.neighbors[i]):
+            cb.nbrs[i][k] = j
+        cb.nbr_mask[i] = board.nbr_mask[i]
+        cb.ring_mask[i] = board.ring_mask[i]
+    for v in range(MAX_VALUE):
+        cb.positions[v] = board.positions.get(v, -1)
+    return cb
+
+
+def solve(grid, walls, on_progress=None, stop_event=None, progress_interval=30000):
+    """Same result dict as zip_solver_v4.solve with rules=V3_RULES, plus
+    "kernel": whether the compiled kernel ran."""
+    board = Board(grid, walls)
+    lib = load()
+    if lib is None or not supported(board):
+        result = solve_v4(
+            grid,
+            walls,
+            rules=V3_RULES,
+            on_progress=on_progress,
+            stop_event=stop_event,
+            progress_interval=progress_interval,
+        )
+        result["kernel"] = False
+        return result
+
+    cb = to_c(board)
+    s = CSearch()
+    s.top = 1
+    s.cell[0], s.next[0], s.depth[0], s.visited[0] = (
+        board.positions[board.start],
+        board.start,
+        0,
+        0,
+    )
+
+    def pruned():
+        return {"distance": s.pruned_distance, "connectivity": s.pruned_connectivity}
+
+    def path():
+        return board.to_cells(s.path[: s.path_len])
+
+    while True:
+        status = lib.zip_search(
+            ctypes.byref(cb), ctypes.byref(s), s.checked + progress_interval
+        )
+        if status != 2:
+            break
+        if stop_event is not None and stop_event.is_set():
+            break
+        if on_progress is not None:
+            on_progress({"checked": s.checked, "path": path(), "pruned": pruned()})
+
+    return {
+        "found": status == 1,
+        "solution": path() if status == 1 else None,
+        "checked": s.checked,
+        "pruned": pruned(),
+        "kernel": True,
+    }
+
+
+if __name__ == "__main__":
+    build(*sys.argv[1:2])
+    print("Built", LIBRARY)
@@ -0,0 +1,48 @@
+# move ordering for the v4 engine
+#
+# An ordering is called as order(board, children, next_search, free) with the
+# open neighbors of the new head (in v3's neighbor order) and returns them in
+# push order: the DFS pops from the end, so the preferred move goes last.
+
+
+def warnsdorff(board, children, next_search, free):
+    """Fewest onward moves first, ties broken by distance to the next number."""
+    nbr_mask = board.nbr_mask
+    t = board.positions.get(next_search)
+    if t is None:
+        return sorted(children, key=lambda j: -(nbr_mask[j] & free).bit_count())
+    return sorted(
+        children,
+        key=lambda j: (-(nbr_mask[j] & free).bit_count(), -board.distance(j, t)),
+    )
+
+
+def target(board, children, next_search, free):
+    """Closest to the next number first."""
+    t = board.positions.get(next_search)
+    if t is None:
+        return children
+    return sorted(children, key=lambda j: -board.distance(j, t))
+
+
+def edge(board, children, next_search, free):
+    """Cells nearest the border first, so the path hugs edges and corners."""
+    border = board.border
+    return sorted(children, key=lambda j: -border[j])
+
+
+# None keeps v3's fixed neighbor order
+ORDERINGS = {
+    "fixed": None,
+    "warnsdorff": warnsdorff,
+    "target": target,
+    "edge": edge,
+}
+
+DEFAULT_ORDERING = "fixed"
+
+
+def get_ordering(name):
+    if name not in ORDERINGS:
+        raise ValueError(f"unknown move ordering: {name}")
+    return ORDERINGS[name]
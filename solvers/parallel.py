@@ -0,0 +1,235 @@
+# parallel v4: split the DFS into subtrees and search them on several processes
+#
+# The coordinator expands the search tree down to split_depth and puts the
+# frontier frames on a shared task queue. Each worker pops a frame and runs the
+# v4 search on it. When a worker runs dry while others are busy, the busy ones
+# re-split: they move their shallowest stack frames (the biggest subtrees left)
+# back onto the task queue. The first solution sets the workers' own stop
+# event, which makes every worker stop; the caller's stop_event is only read,
+# so it still tells a user stop from a finished search afterwards.
+
+import multiprocessing as mp
+import os
+import queue
+
+from solvers.ordering import DEFAULT_ORDERING
+from solvers.pruning import DEFAULT_RULES, feasible
+from solvers.transposition import TranspositionTable
+from solvers.zip_solver_v4 import Board, search
+
+
+def worker(
+    wid, grid, walls, options, tasks, results, pending, hungry, stop_event, interval
+):
+    """Runs tasks until the work runs out or stop_event is set.
+    pending counts tasks queued or running, hungry counts idle workers."""
+    # frames left on the queue after a stop must not block this process' exit
+    tasks.cancel_join_thread()
+    board = Board(grid, walls)
+    tt_mb = options.get("tt_mb", 0)
+    tt = TranspositionTable(tt_mb, options.get("tt_policy", "lru")) if tt_mb else None
+    done = 0
+    pruned = {}
+    idle = False
+
+    def on_progress(msg):
+        results.put(
+            {
+                "worker": wid,
+                "checked": done + msg["checked"],
+                "path": board.to_cells(msg["path"]),
+            }
+        )
+
+    def share(stack):
+        if hungry.value == 0:
+            return
+        # exit markers of ancestors would record a failure for subtrees that
+        # are now searched elsewhere, so they are dropped
+        frames = [f for f in stack if f[0] >= 0]
+        give = frames[: len(frames) // 2]
+        if not give:
+            stack[:] = frames
+            return
+        stack[:] = frames[len(give) :]
+        with pending.get_lock():
+            pending.value += len(give)
+        for frame in give:
+            tasks.put(frame)
+
+    while not stop_event.is_set():
+        try:
+            frame = tasks.get(timeout=0.05)
+        except queue.Empty:
+            if pending.value == 0:
+                break
+            if not idle:
+                idle = True
+                with hungry.get_lock():
+                    hungry.value += 1
+            continue
+        if idle:
+            idle = False
+            with hungry.get_lock():
+                hungry.value -= 1
+
+        try:
+            solution, checked, task_pruned = search(
+                board,
+                [frame],
+                rules=options.get("rules", DEFAULT_RULES),
+                ordering=options.get("ordering", DEFAULT_ORDERING),
+                tt=tt,
+                on_progress=on_progress,
+                stop_event=stop_event,
+                progress_interval=interval,
+                share=share,
+            )
+        except Exception as e:
+            # the subtree is lost, so the search can no longer say "no
+            # solution": everyone stops and solve() raises
+            results.put({"worker": wid, "error": f"{type(e).__name__}: {e}"})
+            stop_event.set()
+            break
+        finally:
+            with pending.get_lock():
+                pending.value -= 1
+        done += checked
+        for name, n in task_pruned.items():
+            pruned[name] = pruned.get(name, 0) + n
+        if solution is not None:
+            results.put({"worker": wid, "solution": board.to_cells(solution)})
+            stop_event.set()
+
+    if idle:
+        with hungry.get_lock():
+            hungry.value -= 1
+    exit_msg = {"worker": wid, "exit": True, "checked": done, "pruned": pruned}
+    if tt is not None:
+        exit_msg["tt"] = tt.stats()
+    results.put(exit_msg)
+
+
+def solve(
+    grid,
+    walls,
+    workers=None,
+    split_depth=8,
+    on_progress=None,
+    stop_event=None,
+    progress_interval=30000,
+    worker_interval=2000,
+    **options,
+):
+    """Same result dict as zip_solver_v4.solve, searched on `workers` processes
+    (default: all cores). options (rules, ordering, tt_mb, tt_policy) are passed
+    to every worker; each worker keeps its own failure memo. on_progress gets
+    {"checked", "path", "workers"} with checked summed over all workers.
+    worker_interval is how often (in checks) workers report, look for a
+    stop and re-split their work. stop_event is never set here; when the
+    caller sets it the workers are told to stop. Raises RuntimeError when a
+    worker fails before a solution is found."""
+    workers = workers or os.cpu_count() or 1
+    board = Board(grid, walls)
+    if board.start is None or not feasible(board):
+        return {"found": False, "solution": None, "checked": 0, "pruned": {}}
+
+    frontier = []
+    stack = [(board.positions[board.start], board.start, None, 0)]
+    solution, checked, pruned = search(
+        board,
+        stack,
+        rules=options.get("rules", DEFAULT_RULES),
+        ordering=options.get("ordering", DEFAULT_ORDERING),
+        split_depth=split_depth,
+        frontier=frontier,
+    )
+    result = {"found": False, "solution": None, "checked": checked, "pruned": pruned}
+    if solution is not None:
+        result.update(found=True, solution=board.to_cells(solution))
+        return result
+    if not frontier:
+        return result
+
+    ctx = mp.get_context()
+    stop = ctx.Event()
+    tasks, results = ctx.Queue(), ctx.Queue()
+    pending, hungry = ctx.Value("i", len(frontier)), ctx.Value("i", 0)
+    tasks.cancel_join_thread()
+    for frame in frontier:
+        tasks.put(frame)
+
+    procs = [
+        ctx.Process(
+            target=worker,
+            args=(
+                wid,
+                grid,
+                walls,
+                options,
+                tasks,
+                results,
+                pending,
+                hungry,
+                stop,
+                worker_interval,
+            ),
+            daemon=True,
+        )
+        for wid in range(workers)
+    ]
+    for p in procs:
+        p.start()
+
+    progress = {}
+    last_update = 0
+    exited = 0
+    tt_stats = {}
+    error = None
+    while exited < workers:
+        if stop_event is not None and stop_event.is_set():
+            stop.set()
+        try:
+            msg = results.get(timeout=0.1)
+        except queue.Empty:
+            # a worker killed outright (e.g. out of memory) sends no error
+            crashed = [p for p in procs if p.exitcode not in (None, 0)]
+            if crashed and error is None:
+                error = f"worker exited with code {crashed[0].exitcode}"
+                stop.set()
+            if not any(p.is_alive() for p in procs):
+                break
+            continue
+
+        if msg.get("exit"):
+            exited += 1
+            progress[msg["worker"]] = msg["checked"]
+            for name, n in msg["pruned"].items():
+                pruned[name] = pruned.get(name, 0) + n
+            for name, n in msg.get("tt", {}).items():
+                tt_stats[name] = tt_stats.get(name, 0) + n
+        elif "error" in msg:
+            if error is None:
+                error = f"worker {msg['worker']}: {msg['error']}"
+        elif "solution" in msg:
+            if result["solution"] is None:
+                result.update(found=True, solution=msg["solution"])
+        else:
+            progress[msg["worker"]] = msg["checked"]
+            total = checked + sum(progress.values())
+            if on_progress is not None and total - last_update >= progress_interval:
+                on_progress({"checked": total, "path": msg["path"], "workers": workers})
+                last_update = total
+
+    for p in procs:
+        p.join(timeout=1)
+        if p.is_alive():
+            p.terminate()
+    if error is not None and not result["found"]:
+        raise RuntimeError(f"parallel search failed, {error}")
+
+    result["checked"] = checked + sum(progress.values())
+    result["pruned"] = pruned
+    if tt_stats:
+        result["tt"] = tt_stats
+    return result
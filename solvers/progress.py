@@ -0,0 +1,100 @@
+# progress channel from a solver process to the GUI over shared memory
+#
+# One fixed-size block holds the latest snapshot: checked count, failure memo
+# stats and the current path (a byte per row and column). The solver
+# overwrites it in place, so nothing is pickled or queued per update, and the
+# GUI reads only the newest snapshot when its timer fires; older ones are
+# simply overwritten. A sequence number makes it a seqlock: the writer makes
+# it odd before writing and even after, and a reader that sees it odd, or
+# changed while it read, reads again.
+#
+# header (little-endian): seq (u64), checked (u64), path length (u32),
+# flags (u32, 1 = memo stats present), memo hits, misses, size (u64 each);
+# then 2 bytes (r, c) per path cell.
+
+import struct
+from itertools import chain
+from multiprocessing import shared_memory
+
+HEADER = struct.Struct("<QQIIQQQ")
+SEQ = struct.Struct("<Q")
+HAS_TT = 1
+
+
+class ProgressChannel:
+    """Latest progress snapshot of one solve, for boards up to cells cells."""
+
+    def __init__(self, shm, owner):
+        self.shm = shm
+        self.owner = owner
+        self.cells = (shm.size - HEADER.size) // 2
+        self.seq = 0  # writer: last sequence number, reader: last one read
+
+    @classmethod
+    def create(cls, cells):
+        """A new channel; the creator unlinks it on close()."""
+        shm = shared_memory.SharedMemory(create=True, size=HEADER.size + 2 * cells)
+        shm.buf[: HEADER.size] = bytes(HEADER.size)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        """The channel another process created, by its name."""
+        return cls(shared_memory.SharedMemory(name=name), owner=False)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def publish(self, msg):
+        """Writes a progress message {"checked", "path"[, "tt"]}."""
+        buf = self.shm.buf
+        path = msg.get("path") or []
+        if len(path) > self.cells:
+            path = path[: self.cells]
+        tt = msg.get("tt")
+        self.seq += 1
+        SEQ.pack_into(buf, 0, self.seq)  # odd: being written
+        HEADER.pack_into(
+            buf,
+            0,
+            self.seq,
+            msg.get("checked", 0),
+            len(path),
+            HAS_TT if tt else 0,
+            tt["hits"] if tt else 0,
+            tt["misses"] if tt else 0,
+            tt["size"] if tt else 0,
+        )
+        cells = bytes(chain.from_iterable(path))
+        buf[HEADER.size : HEADER.size + len(cells)] = cells
+        self.seq += 1
+        SEQ.pack_into(buf, 0, self.seq)
+
+    def read(self, retries=10):
+        """The newest snapshot as a progress message, or None if nothing was
+        published since the last read (or the writer kept it busy)."""
+        buf = self.shm.buf
+        for _ in range(retries):
+            seq, checked, length, flags, hits, misses, size = HEADER.unpack_from(buf)
+            if seq & 1:
+                continue
+            if seq == self.seq:
+                return None
+            cells = bytes(buf[HEADER.size : HEADER.size + 2 * length])
+            if SEQ.unpack_from(buf)[0] != seq:
+                continue
+            self.seq = seq
+            msg = {
+                "checked": checked,
+                "path": list(zip(cells[0::2], cells[1::2])),
+            }
+            if flags & HAS_TT:
+                msg["tt"] = {"hits": hits, "misses": misses, "size": size}
+            return msg
+        return None
+
+    def close(self):
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
@@ -0,0 +1,107 @@
+# pruning rules for the v4 engine
+#
+# A rule is called as rule(board, parent, head, next_search, visited, free) after
+# the head cell has been taken, and returns False when the state cannot be
+# completed. parent is the previous head (None at the start cell), visited and
+# free are bitmasks of taken / still open cells.
+
+
+def distance(board, parent, head, next_search, visited, free):
+    """The next number must be reachable in the cells that are left."""
+    t = board.positions.get(next_search)
+    if t is None:
+        return True
+    return board.distance(head, t) <= free.bit_count()
+
+
+def waypoint_chain(board, parent, head, next_search, visited, free):
+    """The next number, and every later one in order, must fit in the cells left:
+    dist(head, next) + dist(next, next + 1) + ... + dist(end - 1, end) <= open cells."""
+    t = board.positions.get(next_search)
+    chain = board.chain.get(next_search)
+    if t is None or chain is None:
+        return True
+    return board.distance(head, t) + chain <= free.bit_count()
+
+
+def parity(board, parent, head, next_search, visited, free):
+    """Checkerboard counts: after the head the path alternates colors, so the
+    open cells must split evenly between the two colors (one extra of the
+    color opposite the head for an odd count), and the last number must sit on
+    the color the final step lands on. Every step keeps the outcome, so the
+    engines run it once on the start state (see feasible) rather than per
+    node."""
+    if not free:
+        return True
+    black = board.black
+    same = (free & black).bit_count()
+    if not black >> head & 1:
+        same = free.bit_count() - same
+    other = free.bit_count() - same
+    if not 0 <= other - same <= 1:
+        return False
+    end_same = (black >> head ^ black >> board.positions[board.end]) & 1 == 0
+    return end_same == (other == same)
+
+
+def connectivity(board, parent, head, next_search, visited, free):
+    """Every open cell must still be reachable from the head."""
+    if not free:
+        return True
+    if parent is not None:
+        return board.stays_connected(parent, head, free)
+    return board.flood(1 << head, free) & free == free
+
+
+def full_flood(board, parent, head, next_search, visited, free):
+    """connectivity without the incremental shortcut (floods at every node, like v3)."""
+    return not free or board.flood(1 << head, free) & free == free
+
+
+def dead_ends(board, parent, head, next_search, visited, free):
+    """At most one open cell may be left with a single way in: the path's last cell."""
+    dead = board.dead_ends(head, free)
+    return not dead & (dead - 1)
+
+
+def dead_end_target(board, parent, head, next_search, visited, free):
+    """A forced dead end has to be the cell of the last number."""
+    dead = board.dead_ends(head, free)
+    return not dead or dead == 1 << board.positions[board.end]
+
+
+def feasible(board):
+    """Root checks whose outcome no move changes: the parity counts of the
+    start state. False means the board has no solution."""
+    head = board.positions[board.start]
+    visited = 1 << head
+    return parity(board, None, head, board.start + 1, visited, board.full & ~visited)
+
+
+RULES = {
+    "distance": distance,
+    "waypoint_chain": waypoint_chain,
+    "parity": parity,
+    "connectivity": connectivity,
+    "full_flood": full_flood,
+    "dead_ends": dead_ends,
+    "dead_end_target": dead_end_target,
+}
+
+# v3's pruning sequence
+V3_RULES = ("distance", "connectivity")
+
+DEFAULT_RULES = (
+    "waypoint_chain",
+    "dead_ends",
+    "dead_end_target",
+    "connectivity",
+)
+
+
+def get_rules(names):
+    """[(name, rule), ...] for the given rule names, in order."""
+    unknown = [n for n in names if n not in RULES]
+    if unknown:
+        raise ValueError(f"unknown pruning rule(s): {', '.join(unknown)}")
+    return [(n, RULES[n]) for n in names]
@@ -0,0 +1,306 @@
+# puzzle files: a line-oriented JSON format for streaming and a compact binary
+# format that is memory-mapped for random access by index
+#
+# Both hold (id, grid, walls) puzzles, the same tuples solvers.batch reads.
+#
+# .jsonl: one JSON object per line, {"id": ..., "grid": [[...], ...],
+# "walls": [[[r, c], [r, c]], ...]} ("id" and "walls" are optional). A .json
+# file is a single such object.
+#
+# .zpz (all integers little-endian):
+#   header, 16 bytes: b"ZPZ1", version (u8, 1), max_n (u8), record size (u16),
+#     count (u32), 4 reserved zero bytes
+#   count records of record size bytes each, record k at 16 + k * record size:
+#     n (u8), the n * n grid values row by row (u8, 0 for an empty cell),
+#     zero padding up to max_n * max_n, then two bitmasks of
+#     ceil(max_n * max_n / 8) bytes: bit r * n + c of the first is a wall
+#     between (r, c) and (r, c + 1), of the second a wall between (r, c) and
+#     (r + 1, c)
+# Records do not keep ids; a puzzle's id is its index. Boards go up to 15x15,
+# so every number fits in a byte. For 8x8 a record is 81 bytes, 100k puzzles
+# about 8 MB; opening the file reads only the header.
+#
+# python -m solvers.puzzles OUT [INPUT ...] converts between the formats
+# (by extension); without inputs it writes the boards of solvers.grids.
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+
+MAGIC = b"ZPZ1"
+VERSION = 1
+HEADER = struct.Struct("<4sBBHI4x")
+MAX_N = 15
+
+
+def decode(puzzle, default_id=None):
+    """(id, grid, walls) from a JSON object. Raises KeyError / TypeError /
+    ValueError if it is not a puzzle."""
+    grid = [list(map(int, row)) for row in puzzle["grid"]]
+    walls = [tuple(map(tuple, w)) for w in puzzle.get("walls", [])]
+    return puzzle.get("id", default_id), grid, walls
+
+
+def encode(pid, grid, walls):
+    """JSON object for a puzzle, the id left out when it is None."""
+    puzzle = {"id": pid} if pid is not None else {}
+    puzzle["grid"] = [list(row) for row in grid]
+    puzzle["walls"] = [[list(a), list(b)] for a, b in walls]
+    return puzzle
+
+
+def read_jsonl(path):
+    """Yields (id, grid, walls) for every line of a .jsonl file; a puzzle
+    without an id gets "path:line"."""
+    with open(path) as f:
+        for lineno, line in enumerate(f, 1):
+            if line.strip():
+                yield decode(json.loads(line), f"{path}:{lineno}")
+
+
+def write_jsonl(path, puzzles, append=False):
+    """Writes (id, grid, walls) puzzles one per line. Returns how many."""
+    count = 0
+    with open(path, "a" if append else "w") as f:
+        for pid, grid, walls in puzzles:
+            f.write(json.dumps(encode(pid, grid, walls)) + "\n")
+            count += 1
+    return count
+
+
+def record_size(max_n):
+    cells = max_n * max_n
+    return 1 + cells + 2 * ((cells + 7) // 8)
+
+
+def pack(grid, walls, max_n):
+    """One .zpz record."""
+    n = len(grid)
+    if not 0 < n <= max_n or any(len(row) != n for row in grid):
+        raise ValueError(f"grid must be square and at most {max_n}x{max_n}")
+    cells = max_n * max_n
+    mask_bytes = (cells + 7) // 8
+    right = down = 0
+    for a, b in walls:
+        (r1, c1), (r2, c2) = sorted((tuple(a), tuple(b)))
+        if not (0 <= r1 < n and 0 <= c1 < n):
+            raise ValueError(f"wall outside the board: {a}, {b}")
+        if (r2, c2) == (r1, c1 + 1) and c2 < n:
+            right |= 1 << (r1 * n + c1)
+        elif (r2, c2) == (r1 + 1, c1) and r2 < n:
+            down |= 1 << (r1 * n + c1)
+        else:
+            raise ValueError(f"wall between cells that are not neighbours: {a}, {b}")
+    values = bytes(v for row in grid for v in row)  # ValueError past 255
+    return (
+        bytes([n])
+        + values.ljust(cells, b"\0")
+        + right.to_bytes(mask_bytes, "little")
+        + down.to_bytes(mask_bytes, "little")
+    )
+
+
+def unpack(record, max_n):
+    """(grid, walls) from a .zpz record."""
+    n = record[0]
+    cells = max_n * max_n
+    grid = [list(record[1 + r * n : 1 + (r + 1) * n]) for r in range(n)]
+    mask_bytes = (cells + 7) // 8
+    at = 1 + cells
+    walls = []
+    for step, mask in (
+        (1, int.from_bytes(record[at : at + mask_bytes], "little")),
+        (n, int.from_bytes(record[at + mask_bytes : at + 2 * mask_bytes], "little")),
+    ):
+        while mask:
+            low = mask & -mask
+            i = low.bit_length() - 1
+            j = i + step
+            walls.append(((i // n, i % n), (j // n, j % n)))
+            mask ^= low
+    walls.sort()
+    return grid, walls
+
+
+def write_binary(path, puzzles, max_n=None, append=False):
+    """Writes (id, grid, walls) puzzles to a .zpz file (ids are dropped).
+    max_n is the largest board the file can hold, by default the largest
+    puzzle of a list (the first one of any other iterable), or the existing
+    file's when appending. Returns how many puzzles were written."""
+    if max_n is None and isinstance(puzzles, (list, tuple)) and puzzles:
+        max_n = max(len(grid) for _, grid, _ in puzzles)
+    puzzles = iter(puzzles)
+    append = append and os.path.exists(path) and os.path.getsize(path)
+    if append:
+        f = open(path, "r+b")
+    else:
+        first = next(puzzles, None)
+        if first is not None:
+            puzzles = _chain(first, puzzles)
+        max_n = max_n or (len(first[1]) if first is not None else 1)
+        if not 0 < max_n <= MAX_N:
+            raise ValueError(f"boards go up to {MAX_N}x{MAX_N}")
+        f = open(path, "wb")
+    written = 0
+    with f:
+        # inside the with, so a file that is not a .zpz still gets closed
+        if append:
+            _, max_n, _, count = read_header(f.read(HEADER.size), path)
+            f.seek(HEADER.size + count * record_size(max_n))
+            f.truncate()
+        else:
+            count = 0
+            f.write(_header(max_n, 0))
+        try:
+            for _, grid, walls in puzzles:
+                f.write(pack(grid, walls, max_n))
+                written += 1
+        finally:
+            # the count goes in last, so a failed write leaves a valid file
+            f.seek(0)
+            f.write(_header(max_n, count + written))
+    return written
+
+
+def _chain(first, rest):
+    yield first
+    yield from rest
+
+
+def _header(max_n, count):
+    return HEADER.pack(MAGIC, VERSION, max_n, record_size(max_n), count)
+
+
+def read_header(data, name="puzzle file"):
+    """(version, max_n, record size, count) from the first 16 bytes."""
+    if len(data) < HEADER.size:
+        raise ValueError(f"{name}: not a .zpz file")
+    magic, version, max_n, size, count = HEADER.unpack(data[: HEADER.size])
+    if magic != MAGIC or version != VERSION or size != record_size(max_n):
+        raise ValueError(f"{name}: not a version {VERSION} .zpz file")
+    return version, max_n, size, count
+
+
+class PuzzleFile:
+    """A .zpz file, memory-mapped: len(), puzzles[k] and iteration give
+    (k, grid, walls) and only touch the records they read."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                self._map = b""
+        _, self.max_n, self.record_size, count = read_header(self._map, path)
+        # a truncated file holds as many records as are complete
+        available = (len(self._map) - HEADER.size) // self.record_size
+        self.count = min(count, available)
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, k):
+        if k < 0:
+            k += self.count
+        if not 0 <= k < self.count:
+            raise IndexError("puzzle index out of range")
+        at = HEADER.size + k * self.record_size
+        grid, walls = unpack(self._map[at : at + self.record_size], self.max_n)
+        return k, grid, walls
+
+    def __iter__(self):
+        for k in range(self.count):
+            yield self[k]
+
+    def close(self):
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def is_binary(path):
+    return path.endswith(".zpz")
+
+
+def load(path):
+    """Puzzles of a .zpz (a PuzzleFile), .jsonl or .json file (a list)."""
+    if is_binary(path):
+        return PuzzleFile(path)
+    if path.endswith(".json"):
+        with open(path) as f:
+            return [decode(json.load(f), path)]
+    return list(read_jsonl(path))
+
+
+def save(path, puzzles, append=False):
+    """Writes (id, grid, walls) puzzles to a .zpz, .jsonl or .json file (the
+    last holds one puzzle). append adds them to an existing .zpz / .jsonl
+    file. Returns how many puzzles were written."""
+    if is_binary(path):
+        return write_binary(path, puzzles, append=append)
+    if path.endswith(".json"):
+        (pid, grid, walls), = puzzles
+        with open(path, "w") as f:
+            json.dump(encode(pid, grid, walls), f)
+        return 1
+    return write_jsonl(path, puzzles, append)
+
+
+def split_spec(spec):
+    """(path, index) from "FILE" or "FILE:INDEX" (index 0 by default)."""
+    path, _, index = spec.rpartition(":")
+    if not index.isdigit() or not path:
+        return spec, 0
+    return path, int(index)
+
+
+def open_puzzle(spec):
+    """(id, grid, walls) of the puzzle "FILE" or "FILE:INDEX" names."""
+    path, index = split_spec(spec)
+    puzzles = load(path)
+    try:
+        return puzzles[index]
+    finally:
+        if isinstance(puzzles, PuzzleFile):
+            puzzles.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert Zip puzzle files.")
+    parser.add_argument("out", help=".zpz, .jsonl or .json file to write")
+    parser.add_argument(
+        "inputs", nargs="*", help=".zpz/.jsonl/.json files (default solvers.grids)"
+    )
+    parser.add_argument("--append", action="store_true")
+    parser.add_argument("--max-n", type=int, help=".zpz: largest board (streams)")
+    args = parser.parse_args()
+
+    if args.inputs:
+        puzzles = (p for path in args.inputs for p in load(path))
+        if is_binary(args.out) and not args.max_n and not args.append:
+            puzzles = list(puzzles)  # to find the largest board
+    else:
+        from solvers import grids
+
+        names = sorted(n for n in vars(grids) if n.startswith("grid_"))
+        puzzles = [
+            (n, getattr(grids, n), getattr(grids, "walls_" + n[5:], [])) for n in names
+        ]
+    if is_binary(args.out):
+        count = write_binary(args.out, puzzles, args.max_n, args.append)
+    else:
+        count = save(args.out, puzzles, append=args.append)
+    print(f"Wrote {count} puzzles to {args.out}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
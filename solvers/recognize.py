@@ -0,0 +1,327 @@
+# reading puzzles from screenshots (like the ones in grids/)
+#
+# Everything works on the grayscale image as a NumPy array:
+#   lattice  a pixel is on a line if it is darker than the lightest pixel
+#            near it across the line; the columns (rows) where many pixels
+#            are gives the vertical (horizontal) lines, and the N + 1 evenly
+#            spaced ones among them that explain every line inside are the
+#            board
+#   walls    the strip along each cell edge is much darker than along a
+#            plain grid line
+#   numbers  a cell holding a number is mostly a dark disc; the light
+#            pixels inside it are the digits, cut apart at empty columns and
+#            matched against templates of 0-9 drawn in the DejaVu font
+#            matplotlib ships, by normalised correlation (1s by their width)
+# A 1000 x 1000 screenshot takes about 0.1 s.
+#
+# python -m solvers.recognize IMAGE|DIR [...] [--out FILE] [--solve]
+#     [--engine v4]
+# prints the puzzle read from every image (directories: every .png / .jpg
+# in them), --out saves them to a puzzle file (see solvers.puzzles) with
+# the file names as ids, --solve solves each one too.
+
+import argparse
+import importlib.util
+import os
+import sys
+import time
+
+from solvers import api, puzzles
+
+# lines are at most this many pixels wide, once the image is scaled to
+# at most MAX_SIDE pixels
+LINE_WIDTH = 12
+MAX_SIDE = 1000
+# gray levels a line must be darker than its surroundings, tried in turn:
+# the faint lines of a small screenshot only show at the lower one, which
+# on others picks up noise
+LINE_CONTRASTS = (6, 3)
+# gray levels between a wall and a line, numbers and their background
+CONTRAST = 6
+IMAGE_TYPES = (".png", ".jpg", ".jpeg", ".bmp", ".webp")
+# digit templates: height x width, and the (matplotlib) font they are drawn in
+GLYPH = (12, 8)
+FONT = "DejaVuSans-Bold.ttf"
+# width / height under which a digit is a 1 (0.45 in sans fonts, others 0.6+)
+ONE_WIDTH = 0.52
+
+_templates = None
+
+
+def load_image(source):
+    """Grayscale image (a path or PIL image) as a 2-D int16 array, scaled
+    down to at most MAX_SIDE pixels a side."""
+    import numpy as np
+    from PIL import Image
+
+    image = source if isinstance(source, Image.Image) else Image.open(source)
+    image = image.convert("L")
+    scale = MAX_SIDE / max(image.size)
+    if scale < 1:
+        size = (round(image.width * scale), round(image.height * scale))
+        image = image.resize(size, Image.LANCZOS)
+    return np.asarray(image, dtype=np.int16)
+
+
+def line_profile(gray, axis, contrast):
+    """For every column (axis 1) or row (axis 0): how many of its pixels
+    are contrast darker than the lightest pixel within LINE_WIDTH / 2
+    across."""
+    import numpy as np
+    from numpy.lib.stride_tricks import sliding_window_view
+
+    k = LINE_WIDTH // 2
+    pad = [(0, 0), (0, 0)]
+    pad[axis] = (k, k)
+    padded = np.pad(gray, pad, mode="edge")
+    lightest = sliding_window_view(padded, 2 * k + 1, axis=axis).max(-1)
+    return ((lightest - gray) > contrast).sum(axis=1 - axis)
+
+
+def line_positions(profile, share=0.4):
+    """Centres of the runs of columns (rows) whose profile is at least share
+    of the highest."""
+    import numpy as np
+
+    on = np.nonzero(profile >= share * profile.max())[0]
+    if not len(on):
+        return []
+    runs = np.split(on, np.nonzero(np.diff(on) > 2)[0] + 1)
+    return [float(run.mean()) for run in runs]
+
+
+def fit_lattice(lines, min_n=2, max_n=puzzles.MAX_N):
+    """(N, positions) of N + 1 evenly spaced lines, the first and last taken
+    from lines, such that every line between them is one of the N - 1 and
+    each of those is there. The widest such, then the closest fit; None if
+    there is none."""
+    best = None
+    for i, first in enumerate(lines):
+        for last in lines[i + 1 :]:
+            inside = [x for x in lines if first < x < last]
+            if not inside:
+                continue
+            for N in range(min_n, max_n + 1):
+                step = (last - first) / N
+                tolerance = 0.1 * step
+                expected = [first + k * step for k in range(1, N)]
+                errors = [min(abs(x - e) for x in inside) for e in expected]
+                if max(errors) > tolerance or any(
+                    min(abs(x - e) for e in expected) > tolerance for x in inside
+                ):
+                    continue
+                key = (first - last, sum(errors) / step / (N - 1))
+                if best is None or key < best[0]:
+                    best = key, N, [first + k * step for k in range(N + 1)]
+    return best and (best[1], best[2])
+
+
+def find_lattice(gray):
+    """(N, xs, ys): the board's N + 1 vertical and horizontal line positions."""
+    for contrast in LINE_CONTRASTS:
+        xs = fit_lattice(line_positions(line_profile(gray, 1, contrast)))
+        ys = fit_lattice(line_positions(line_profile(gray, 0, contrast)))
+        if xs is None or ys is None:
+            error = "no grid found"
+        elif xs[0] != ys[0]:
+            error = f"grid is {xs[0]} columns by {ys[0]} rows"
+        else:
+            return xs[0], xs[1], ys[1]
+    raise ValueError(error)
+
+
+def find_walls(gray, xs, ys, white, ratio=3.0):
+    """Walls as ((r, c), (r, c)) pairs: cell edges whose middle is at least
+    ratio times as dark as the median edge."""
+    import numpy as np
+
+    N = len(xs) - 1
+    step = (xs[-1] - xs[0] + ys[-1] - ys[0]) / (2 * N)
+    across, along = 0.15 * step, 0.25 * step
+    ink = np.clip(white - gray, 0, None)
+    edges, scores = [], []
+    for r in range(N):
+        for c in range(N):
+            if c < N - 1:  # the vertical edge right of (r, c)
+                x = xs[c + 1]
+                strip = ink[
+                    int(ys[r] + along) : int(ys[r + 1] - along),
+                    int(x - across) : int(x + across) + 1,
+                ]
+                edges.append(((r, c), (r, c + 1)))
+                scores.append(strip.sum(axis=1).mean())
+            if r < N - 1:  # the horizontal edge below (r, c)
+                y = ys[r + 1]
+                strip = ink[
+                    int(y - across) : int(y + across) + 1,
+                    int(xs[c] + along) : int(xs[c + 1] - along),
+                ]
+                edges.append(((r, c), (r + 1, c)))
+                scores.append(strip.sum(axis=0).mean())
+    if not edges:
+        return []
+    scores = np.array(scores)
+    limit = ratio * max(np.median(scores), CONTRAST)
+    return [edge for edge, score in zip(edges, scores) if score > limit]
+
+
+def templates():
+    """[(digit, GLYPH array)] of 0-9 in FONT, drawn once per process."""
+    global _templates
+    if _templates is None:
+        import numpy as np
+        from PIL import Image, ImageDraw, ImageFont
+
+        # found without importing matplotlib, which takes longer than this
+        (package,) = importlib.util.find_spec("matplotlib").submodule_search_locations
+        path = os.path.join(package, "mpl-data", "fonts", "ttf", FONT)
+        font = ImageFont.truetype(path, 64)
+        _templates = []
+        for digit in range(10):
+            image = Image.new("L", (96, 96), 0)
+            ImageDraw.Draw(image).text((16, 8), str(digit), fill=255, font=font)
+            _templates.append((digit, normalise(np.asarray(image) / 255.0)))
+    return _templates
+
+
+def crop(ink):
+    """ink cut down to the box around its pixels above 0.5."""
+    import numpy as np
+
+    rows = np.nonzero(ink.max(axis=1) > 0.5)[0]
+    cols = np.nonzero(ink.max(axis=0) > 0.5)[0]
+    return ink[rows[0] : rows[-1] + 1, cols[0] : cols[-1] + 1]
+
+
+def normalise(ink):
+    """A glyph (ink 0..1) cropped, stretched to GLYPH and made zero mean,
+    unit norm. Stretching takes out how wide a font draws its digits."""
+    import numpy as np
+    from PIL import Image
+
+    height, width = GLYPH
+    image = Image.fromarray((crop(ink) * 255).astype(np.uint8))
+    glyph = np.asarray(image.resize((width, height), Image.BILINEAR), dtype=float)
+    glyph -= glyph.mean()
+    norm = np.linalg.norm(glyph)
+    return glyph / norm if norm else glyph
+
+
+def read_digit(ink):
+    """The digit whose template correlates best with a glyph. A glyph under
+    half as wide as it is high is a 1, whatever the font does with its foot."""
+    h, w = crop(ink).shape
+    if w < ONE_WIDTH * h:
+        return 1
+    glyph = normalise(ink)
+    return max(templates(), key=lambda t: (glyph * t[1]).sum())[0]
+
+
+def read_number(gray, white, black, box):
+    """The number in the disc inside box (top, bottom, left, right), 0 if
+    the cell has no disc."""
+    import numpy as np
+
+    top, bottom, left, right = box
+    cell = gray[top:bottom, left:right]
+    level = (white + black) / 2
+    dark = cell < level
+    if dark.mean() < 0.2:
+        return 0
+    rows = np.nonzero(dark.any(axis=1))[0]
+    cols = np.nonzero(dark.any(axis=0))[0]
+    cy, cx = (rows[0] + rows[-1]) / 2, (cols[0] + cols[-1]) / 2
+    radius = (rows[-1] - rows[0] + cols[-1] - cols[0]) / 4
+    yy, xx = np.ogrid[: cell.shape[0], : cell.shape[1]]
+    inside = (yy - cy) ** 2 + (xx - cx) ** 2 < (0.85 * radius) ** 2
+    ink = np.where(inside, np.clip((cell - black) / (white - black), 0, 1), 0)
+    # digits are the runs of columns with ink, noise left out
+    on = np.nonzero((ink > 0.5).sum(axis=0) >= 2)[0]
+    if not len(on):
+        return 0
+    number = 0
+    for run in np.split(on, np.nonzero(np.diff(on) > 1)[0] + 1):
+        if len(run) < 0.05 * radius:
+            continue
+        digit = read_digit(ink[:, run[0] : run[-1] + 1])
+        number = 10 * number + digit
+    return number
+
+
+def recognize(source):
+    """(grid, walls) of the puzzle in a screenshot (a path or PIL image).
+    Raises ValueError if there is no board in it or its numbers cannot all
+    be read (they must be 1 to K, each once)."""
+    import numpy as np
+
+    gray = load_image(source)
+    N, xs, ys = find_lattice(gray)
+    board = gray[int(ys[0]) : int(ys[-1]) + 1, int(xs[0]) : int(xs[-1]) + 1]
+    white, black = np.percentile(board, [75, 1])
+    if white - black < 4 * CONTRAST:
+        raise ValueError("no numbers found")
+    walls = find_walls(gray, xs, ys, white)
+    grid = [[0] * N for _ in range(N)]
+    for r in range(N):
+        for c in range(N):
+            dx, dy = 0.1 * (xs[c + 1] - xs[c]), 0.1 * (ys[r + 1] - ys[r])
+            box = (
+                int(ys[r] + dy),
+                int(ys[r + 1] - dy),
+                int(xs[c] + dx),
+                int(xs[c + 1] - dx),
+            )
+            grid[r][c] = read_number(gray, white, black, box)
+    numbers = sorted(v for row in grid for v in row if v)
+    if numbers != list(range(1, len(numbers) + 1)):
+        raise ValueError(f"numbers read are not 1 to {len(numbers)}: {numbers}")
+    return grid, walls
+
+
+def image_files(sources):
+    """The image files among sources, directories expanded (sorted)."""
+    for source in sources:
+        if os.path.isdir(source):
+            for name in sorted(os.listdir(source)):
+                if name.lower().endswith(IMAGE_TYPES):
+                    yield os.path.join(source, name)
+        else:
+            yield source
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Read Zip puzzles from screenshots.")
+    parser.add_argument("inputs", nargs="+", help="images or directories of them")
+    parser.add_argument("--out", help="add the puzzles to this .zpz / .jsonl file")
+    parser.add_argument("--solve", action="store_true", help="solve them too")
+    parser.add_argument("--engine", default="v4", choices=list(api.ENGINES))
+    args = parser.parse_args()
+
+    found, failed = [], 0
+    for path in image_files(args.inputs):
+        start = time.perf_counter()
+        try:
+            grid, walls = recognize(path)
+        except (OSError, ValueError) as e:
+            print(f"{path}: {e}", file=sys.stderr)
+            failed += 1
+            continue
+        read = time.perf_counter() - start
+        print(f"{path}: {len(grid)}x{len(grid)}, {len(walls)} walls ({read:.3f}s)")
+        for row in grid:
+            print("  " + " ".join(f"{v:>2}" if v else " ." for v in row))
+        if args.solve:
+            result = api.solve(grid, walls, args.engine)
+            total = time.perf_counter() - start
+            status = "solved" if result["found"] else "no solution"
+            print(f"  {status}, {total:.3f}s from the screenshot: {result['solution']}")
+        found.append((os.path.basename(path), grid, walls))
+    if args.out and found:
+        puzzles.save(args.out, found, append=True)
+        print(f"Added {len(found)} puzzles to {args.out}", file=sys.stderr)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,350 @@
+# batch rendering of solutions to PNG files or contact sheets
+#
+# The images look like solvers.utils.draw_path_walls (numbers, walls, a red
+# arrow and dot per step), but instead of a new figure and new artists per
+# image every process keeps one Renderer per board size: a figure whose grid
+# is drawn once and cached as a pixel background, plus preallocated walls,
+# numbers, dots and arrows that are moved to the next puzzle and drawn on top
+# of it. The pixels are cropped the way savefig(bbox_inches="tight") crops
+# and written with PIL, or shrunk into a cell of a contact sheet.
+#
+# Solutions come from a solvers.batch output file (--results, matched by
+# puzzle id), else from the solution cache; a puzzle without one is drawn
+# without a path.
+#
+# python -m solvers.render INPUT [INPUT ...] [--results FILE]
+#     [--out-dir DIR] [--sheet FILE] [--columns 10] [--cell 200]
+#     [--per-sheet 100] [--workers K] [--cache FILE | --no-cache]
+# INPUT is anything solvers.batch reads. A sheet with more puzzles than
+# --per-sheet is split into FILE-1.png, FILE-2.png, ...
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import re
+import sys
+import time
+
+from solvers import cache as solution_cache
+
+PATH_COLOR = "red"
+
+
+class Renderer:
+    """Draws solutions of N x N boards into RGBA arrays, reusing one figure."""
+
+    def __init__(self, N):
+        # the Agg canvas directly: no pyplot, so no GUI backend and no
+        # global figure list in worker processes
+        import matplotlib
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.collections import LineCollection, PathCollection
+        from matplotlib.figure import Figure
+
+        self.N = N
+        self.fig = Figure()
+        self.canvas = FigureCanvasAgg(self.fig)
+        ax = self.ax = self.fig.add_subplot()
+        for i in range(N + 1):
+            ax.plot([0, N], [i, i], color="black", linewidth=1)
+            ax.plot([i, i], [0, N], color="black", linewidth=1)
+        ax.set_aspect("equal")
+        ax.axis("off")
+
+        self.walls = LineCollection(
+            [], colors="black", linewidths=5, capstyle="projecting", animated=True
+        )
+        ax.add_collection(self.walls, autolim=False)
+        (self.dots,) = ax.plot(
+            [], [], "o", color=PATH_COLOR, markersize=5, animated=True
+        )
+        self.texts = [
+            ax.text(
+                c + 0.5,
+                N - r - 0.5,
+                "",
+                color="blue",
+                weight="bold",
+                ha="center",
+                va="center",
+                fontsize=12,
+                animated=True,
+            )
+            for r in range(N)
+            for c in range(N)
+        ]
+        # an annotate arrow is clipped and shrunk with bezier splits on
+        # every draw; all of them are one of four shapes, so those are made
+        # once (at the first cell) and moved to every step
+        self.arrows = PathCollection(
+            [],
+            facecolors="none",
+            edgecolors=PATH_COLOR,
+            linewidths=2,
+            capstyle="butt",
+            joinstyle="round",
+            animated=True,
+        )
+        self.arrows.set_transform(ax.transData)
+        ax.add_collection(self.arrows, autolim=False)
+        templates = {
+            step: ax.annotate(
+                "",
+                xy=(0.5 + step[0], 0.5 + step[1]),
+                xycoords="data",
+                xytext=(0.5, 0.5),
+                textcoords="data",
+                arrowprops=dict(arrowstyle="->", color=PATH_COLOR, lw=2),
+                annotation_clip=False,  # half of them point off the board
+            )
+            for step in ((1, 0), (-1, 0), (0, 1), (0, -1))
+        }
+
+        self.canvas.draw()
+        self.arrow_shapes = {}
+        for step, arrow in templates.items():
+            patch = arrow.arrow_patch  # its path is in display coordinates
+            to_data = patch.get_transform() - ax.transData
+            self.arrow_shapes[step] = to_data.transform_path(patch.get_path())
+            arrow.remove()
+        self.canvas.draw()
+        self.background = self.canvas.copy_from_bbox(self.fig.bbox)
+        # the pixels savefig(bbox_inches="tight") keeps: the drawn extent
+        # plus pad_inches
+        pad = matplotlib.rcParams["savefig.pad_inches"]
+        tight = self.fig.get_tightbbox(self.canvas.get_renderer()).padded(pad)
+        x0, y0, x1, y1 = tight.extents * self.fig.dpi
+        top = int(round(self.canvas.get_width_height()[1] - y1))
+        left = int(round(x0))
+        self.crop = (
+            slice(top, top + int(y1 - y0)),
+            slice(left, left + int(x1 - x0)),
+        )
+
+    def render(self, grid, walls=(), path=None):
+        """RGBA uint8 array of the board with path drawn on it."""
+        import numpy as np
+        from matplotlib.path import Path
+
+        N = self.N
+        self.canvas.restore_region(self.background)
+        renderer = self.canvas.get_renderer()
+
+        segments = []
+        for (r1, c1), (r2, c2) in walls:
+            if r1 == r2:  # wall on the right edge of the left cell
+                x = max(c1, c2)
+                segments.append([(x, N - r1 - 1), (x, N - r1)])
+            elif c1 == c2:  # wall on the top edge of the bottom cell
+                y = N - max(r1, r2)
+                segments.append([(c1, y), (c1 + 1, y)])
+        if segments:
+            self.walls.set_segments(segments)
+            self.walls.draw(renderer)
+
+        # same order as matplotlib draws utils' figure: lines, texts, arrows
+        centers = [(c + 0.5, N - r - 0.5) for r, c in path or ()]
+        if centers:
+            self.dots.set_data(*zip(*centers))
+            self.dots.draw(renderer)
+        for r in range(N):
+            for c in range(N):
+                if grid[r][c] != 0:
+                    text = self.texts[r * N + c]
+                    text.set_text(str(grid[r][c]))
+                    text.draw(renderer)
+        if len(centers) > 1:
+            arrows = []
+            for (x0, y0), (x1, y1) in zip(centers, centers[1:]):
+                shape = self.arrow_shapes[(round(x1 - x0), round(y1 - y0))]
+                arrows.append(Path(shape.vertices + (x0 - 0.5, y0 - 0.5), shape.codes))
+            self.arrows.set_paths(arrows)
+            self.arrows.draw(renderer)
+
+        pixels = np.asarray(self.canvas.buffer_rgba())
+        return pixels[self.crop].copy()
+
+
+# per process renderers by board size, and solution caches by path
+_renderers = {}
+_caches = {}
+
+
+def render(grid, walls=(), path=None):
+    """RGBA array of one solution, by this process' Renderer for the size."""
+    N = len(grid)
+    if N not in _renderers:
+        _renderers[N] = Renderer(N)
+    return _renderers[N].render(grid, walls, path)
+
+
+def save_png(pixels, filename):
+    from PIL import Image
+
+    Image.fromarray(pixels).save(filename)
+
+
+def thumbnail(pixels, cell, label=None):
+    """pixels shrunk to fit a cell x cell RGB tile, label written under it."""
+    from PIL import Image, ImageDraw
+
+    image = Image.fromarray(pixels).convert("RGB")
+    image.thumbnail((cell, cell - 12 if label else cell))
+    tile = Image.new("RGB", (cell, cell), "white")
+    tile.paste(image, ((cell - image.width) // 2, 0))
+    if label:
+        ImageDraw.Draw(tile).text((2, cell - 12), label[: cell // 6], fill="black")
+    return tile
+
+
+def file_name(pid):
+    """A PNG file name for a puzzle id ("a/b.jsonl:3" -> "a_b.jsonl_3.png")."""
+    return re.sub(r"[^\w.-]", "_", str(pid)) + ".png"
+
+
+def render_one(task):
+    """Pool task: renders one solution. Returns (id, tile or None, error)."""
+    pid, grid, walls, path, cache, out_dir, cell = task
+    if grid is None:
+        return pid, None, walls
+    try:
+        if path is None and cache:
+            solutions = _caches.setdefault(cache, solution_cache.SolutionCache(cache))
+            try:
+                hit = solutions.get(grid, walls)
+            except solution_cache.ERRORS:
+                hit = None
+            path = hit and hit["solution"]
+        pixels = render(grid, walls, path)
+        if out_dir:
+            save_png(pixels, os.path.join(out_dir, file_name(pid)))
+        tile = thumbnail(pixels, cell, str(pid)).tobytes() if cell else None
+    except Exception as e:
+        return pid, None, f"{type(e).__name__}: {e}"
+    return pid, tile, None
+
+
+def sheet_names(sheet, pages):
+    if pages == 1:
+        return [sheet]
+    stem, ext = os.path.splitext(sheet)
+    return [f"{stem}-{k}{ext or '.png'}" for k in range(1, pages + 1)]
+
+
+def render_stream(
+    puzzles,
+    solutions=None,
+    out_dir=None,
+    sheet=None,
+    columns=10,
+    cell=200,
+    per_sheet=100,
+    workers=None,
+    cache=solution_cache.DEFAULT_PATH,
+):
+    """Renders (id, grid, walls) puzzles on `workers` processes: one PNG per
+    puzzle in out_dir and / or contact sheets of per_sheet puzzles. solutions
+    maps ids to paths (solvers.batch records); the rest come from the
+    solution cache file (None for none). Returns (rendered, errors, sheet
+    files)."""
+    from PIL import Image
+
+    for directory in (out_dir, sheet and os.path.dirname(sheet)):
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+    solutions = solutions or {}
+    cell = cell if sheet else None
+    tasks = (
+        (pid, grid, walls, solutions.get(pid), cache, out_dir, cell)
+        for pid, grid, walls in puzzles
+    )
+    tiles, pages, errors, rendered = [], [], [], 0
+
+    def flush():
+        if not tiles:
+            return
+        rows = (len(tiles) + columns - 1) // columns
+        page = Image.new("RGB", (columns * cell, rows * cell), "white")
+        for k, tile in enumerate(tiles):
+            image = Image.frombytes("RGB", (cell, cell), tile)
+            page.paste(image, ((k % columns) * cell, (k // columns) * cell))
+        name = f"{sheet}.{len(pages) + 1}.tmp.png"  # renamed once all are known
+        page.save(name)
+        pages.append(name)
+        tiles.clear()
+
+    workers = workers or os.cpu_count() or 1
+    with mp.get_context().Pool(workers) as pool:
+        for pid, tile, error in pool.imap(render_one, tasks, chunksize=4):
+            if error is not None:
+                errors.append((pid, error))
+                continue
+            rendered += 1
+            if tile is not None:
+                tiles.append(tile)
+                if len(tiles) == per_sheet:
+                    flush()
+    flush()
+    names = sheet_names(sheet, len(pages)) if sheet else []
+    for tmp, name in zip(pages, names):
+        os.replace(tmp, name)
+    return rendered, errors, names
+
+
+def read_results(path):
+    """{id: path} of the solved puzzles in a solvers.batch output file."""
+    solutions = {}
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                if record.get("path"):
+                    solutions[record["id"]] = [tuple(p) for p in record["path"]]
+    return solutions
+
+
+def main():
+    from solvers.batch import read_puzzles
+
+    parser = argparse.ArgumentParser(description="Render Zip solutions to PNGs.")
+    parser.add_argument("inputs", nargs="+", help=".jsonl/.json/.zpz files, dirs or -")
+    parser.add_argument("--results", help="solvers.batch output with the paths")
+    parser.add_argument("--out-dir", help="write one PNG per puzzle here")
+    parser.add_argument("--sheet", help="write contact sheets to this PNG")
+    parser.add_argument("--columns", type=int, default=10)
+    parser.add_argument("--cell", type=int, default=200, help="sheet cell, pixels")
+    parser.add_argument("--per-sheet", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--cache", default=solution_cache.DEFAULT_PATH)
+    parser.add_argument("--no-cache", dest="cache", action="store_const", const=None)
+    args = parser.parse_args()
+    if not args.out_dir and not args.sheet:
+        parser.error("nothing to write: give --out-dir and / or --sheet")
+
+    start = time.perf_counter()
+    rendered, errors, sheets = render_stream(
+        read_puzzles(args.inputs),
+        read_results(args.results) if args.results else None,
+        args.out_dir,
+        args.sheet,
+        args.columns,
+        args.cell,
+        args.per_sheet,
+        args.workers,
+        args.cache,
+    )
+    elapsed = time.perf_counter() - start
+    for pid, error in errors:
+        print(f"{pid}: {error}", file=sys.stderr)
+    for name in sheets:
+        print(f"Wrote {name}", file=sys.stderr)
+    print(
+        f"{rendered} solutions in {elapsed:.2f}s ({rendered / elapsed:.1f}/s), "
+        f"{len(errors)} errors",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+# anytime solving: the v4 search as a stream of progress events
+#
+# SolveStream runs v4's explicit-stack DFS (solvers.zip_solver_v4.search) in
+# slices of `step` nodes. Between slices nothing runs, so the caller sets the
+# pace: iterating pulls the next slice, a loop that stops pulling pauses the
+# search, and cancel() (or setting stop_event from another thread or process)
+# ends it at the next slice. The search stack and counters are the whole
+# state of the search, so checkpoint() returns them as a JSON-able dict and
+# SolveStream.resume(checkpoint) carries on where it stopped; the failure
+# memo (tt_mb) starts empty again on resume.
+#
+# engine="v2" or "v3" streams those engines' searches instead. Their explicit
+# stacks hold lists and sets, but v4's search with their pruning and the fixed
+# move order takes the same nodes in the same order (same "checked" and
+# solution), so they run on v4's stack. v1 recurses and cannot be sliced.
+#
+# events are dicts:
+#   {"type": "progress", "checked", "nodes_per_s", "depth", "path", "best",
+#    "pruned", "elapsed"[, "tt"]}  at most one per `interval` seconds; path
+#    is the current partial path as (r, c) cells, best the longest seen
+#   {"type": "done", "found", "solution", "checked", "pruned", "elapsed",
+#    "cancelled"[, "tt"]}  always the last one
+#
+# for event in SolveStream(grid, walls, interval=0.5):
+#     ...
+# async for event in SolveStream(grid, walls).events():  (yields to the event
+#     loop after every slice)
+#
+# python -m solvers.stream FILE[:INDEX] [--engine v4] [--interval 0.5]
+#     [--max-time S] [--checkpoint FILE] [--resume FILE] prints the events as
+#     JSON lines;
+# with --max-time the search is cancelled after S seconds and its
+# checkpoint written to --checkpoint, which --resume picks up.
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+from solvers import puzzles
+from solvers.ordering import DEFAULT_ORDERING
+from solvers.pruning import DEFAULT_RULES, V3_RULES, feasible
+from solvers.transposition import TranspositionTable
+from solvers.zip_solver_v4 import Board, search, unroll
+
+CHECKPOINT_VERSION = 1
+
+# pruning rules of the older engines whose search v4 reproduces
+ENGINE_RULES = {"v2": ("distance",), "v3": V3_RULES}
+
+
+class SolveStream:
+    """Iterable of the progress events of one v4 search; see the module
+    comment."""
+
+    def __init__(
+        self,
+        grid,
+        walls=(),
+        interval=0.5,
+        step=10000,
+        rules=DEFAULT_RULES,
+        ordering=DEFAULT_ORDERING,
+        tt_mb=0,
+        stop_event=None,
+        engine="v4",
+    ):
+        if engine != "v4":
+            if engine not in ENGINE_RULES:
+                raise ValueError(f"cannot stream engine {engine!r}")
+            rules, ordering = ENGINE_RULES[engine], "fixed"
+        self.grid = [list(row) for row in grid]
+        self.walls = [tuple(map(tuple, w)) for w in walls]
+        self.interval = interval
+        self.step = step
+        self.rules = list(rules)
+        self.ordering = ordering
+        self.tt_mb = tt_mb
+        self.stop_event = stop_event
+        self.board = Board(self.grid, self.walls)
+        self.tt = TranspositionTable(tt_mb) if tt_mb else None
+        self.checked = 0
+        self.pruned = {name: 0 for name in self.rules}
+        self.elapsed = 0.0
+        self.best = []
+        self.solution = None
+        self.cancelled = False
+        board = self.board
+        if board.start is None or not feasible(board):
+            self.stack = []
+        else:
+            self.stack = [(board.positions[board.start], board.start, None, 0)]
+
+    @classmethod
+    def resume(cls, checkpoint, **options):
+        """A stream that carries on from checkpoint(); options are
+        SolveStream's interval, step and stop_event."""
+        if checkpoint.get("version") != CHECKPOINT_VERSION:
+            raise ValueError("not a version 1 checkpoint")
+        stream = cls(
+            checkpoint["grid"],
+            checkpoint["walls"],
+            rules=checkpoint["rules"],
+            ordering=checkpoint["ordering"],
+            tt_mb=checkpoint["tt_mb"],
+            **options,
+        )
+        stream.checked = checkpoint["checked"]
+        stream.pruned = dict(checkpoint["pruned"])
+        stream.elapsed = checkpoint["elapsed"]
+        stream.best = [tuple(cell) for cell in checkpoint["best"]]
+        stream.stack = [thaw(frame) for frame in checkpoint["stack"]]
+        return stream
+
+    def checkpoint(self):
+        """The state of the search as a dict of plain lists and numbers (for
+        json or pickle); resume() continues from it."""
+        return {
+            "version": CHECKPOINT_VERSION,
+            "grid": self.grid,
+            "walls": [[list(a), list(b)] for a, b in self.walls],
+            "rules": self.rules,
+            "ordering": self.ordering,
+            "tt_mb": self.tt_mb,
+            "checked": self.checked,
+            "pruned": dict(self.pruned),
+            "elapsed": self.elapsed,
+            "best": [list(cell) for cell in self.best],
+            "stack": [freeze(frame) for frame in self.stack],
+        }
+
+    def cancel(self):
+        """Ends the search at the next slice; the checkpoint stays valid."""
+        self.cancelled = True
+
+    def finished(self):
+        return self.solution is not None or not self.stack
+
+    def _slices(self):
+        # one item per slice: an event, or None when none is due yet
+        board = self.board
+        last_event = time.perf_counter()
+        last_checked, last_elapsed = self.checked, self.elapsed
+        while not self.finished():
+            if self.cancelled or (self.stop_event and self.stop_event.is_set()):
+                self.cancelled = True
+                break
+            start = time.perf_counter()
+            solution, checked, pruned = search(
+                board,
+                self.stack,
+                rules=self.rules,
+                ordering=self.ordering,
+                tt=self.tt,
+                progress_interval=self.step,
+                budget=self.step,
+            )
+            now = time.perf_counter()
+            self.elapsed += now - start
+            self.checked += checked
+            for name, count in pruned.items():
+                self.pruned[name] += count
+            if solution is not None:
+                self.solution = board.to_cells(solution)
+                break
+            if not self.stack or now - last_event < self.interval:
+                yield None
+                continue
+            i, _, path, _ = self.stack[-1]
+            current = board.to_cells(unroll((i, path)))
+            if len(current) > len(self.best):
+                self.best = current
+            event = {
+                "type": "progress",
+                "checked": self.checked,
+                # search time only: not while the caller held the stream
+                "nodes_per_s": (self.checked - last_checked)
+                / max(self.elapsed - last_elapsed, 1e-9),
+                "depth": len(current),
+                "path": current,
+                "best": self.best,
+                "pruned": dict(self.pruned),
+                "elapsed": self.elapsed,
+            }
+            if self.tt is not None:
+                event["tt"] = self.tt.stats()
+            last_event = now
+            last_checked, last_elapsed = self.checked, self.elapsed
+            yield event
+        yield self.result()
+
+    def result(self):
+        """The final event: found and solution (None until one is found)."""
+        result = {
+            "type": "done",
+            "found": self.solution is not None,
+            "solution": self.solution,
+            "checked": self.checked,
+            "pruned": dict(self.pruned),
+            "elapsed": self.elapsed,
+            "cancelled": self.cancelled and not self.finished(),
+        }
+        if self.tt is not None:
+            result["tt"] = self.tt.stats()
+        return result
+
+    def __iter__(self):
+        for event in self._slices():
+            if event is not None:
+                yield event
+
+    async def events(self):
+        """The same events as an async iterator, giving the event loop a turn
+        after every slice."""
+        for event in self._slices():
+            if event is not None:
+                yield event
+            await asyncio.sleep(0)
+
+
+def freeze(frame):
+    """A stack frame as JSON-able lists: its path chain becomes a list."""
+    i, next_search, path, visited = frame
+    if i < 0:  # exit marker (-1, memo key, depth, 0)
+        return [i, next_search, path, visited]
+    return [i, next_search, unroll(path), visited]
+
+
+def thaw(frame):
+    """The stack frame freeze() made."""
+    i, next_search, path, visited = frame
+    if i < 0:
+        return i, next_search, path, visited
+    chain = None
+    for cell in path:
+        chain = (cell, chain)
+    return i, next_search, chain, visited
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream the progress of a solve.")
+    parser.add_argument("puzzle", nargs="?", help="FILE[:INDEX] (see solvers.puzzles)")
+    parser.add_argument("--interval", type=float, default=0.5, help="s per event")
+    parser.add_argument("--max-time", type=float, help="cancel after this many s")
+    parser.add_argument("--checkpoint", help="write the checkpoint here at the end")
+    parser.add_argument("--resume", help="carry on from this checkpoint")
+    parser.add_argument("--tt-mb", type=int, default=0)
+    parser.add_argument("--engine", choices=["v4", *ENGINE_RULES], default="v4")
+    args = parser.parse_args()
+
+    if args.resume:
+        with open(args.resume) as f:
+            stream = SolveStream.resume(json.load(f), interval=args.interval)
+    elif args.puzzle:
+        _, grid, walls = puzzles.open_puzzle(args.puzzle)
+        stream = SolveStream(
+            grid,
+            walls,
+            interval=args.interval,
+            tt_mb=args.tt_mb,
+            engine=args.engine,
+        )
+    else:
+        parser.error("give a puzzle or --resume")
+
+    start = time.perf_counter()
+    for event in stream:
+        print(json.dumps(event), flush=True)
+        if args.max_time and time.perf_counter() - start > args.max_time:
+            stream.cancel()
+    if args.checkpoint:
+        with open(args.checkpoint, "w") as f:
+            json.dump(stream.checkpoint(), f)
+        print(f"Checkpoint written to {args.checkpoint}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
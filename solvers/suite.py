@@ -0,0 +1,232 @@
+# benchmark suite: every engine of solvers.api on every registered puzzle
+#
+# Puzzles are the boards of solvers.grids, plus any puzzle files given with
+# --puzzles (see solvers.puzzles). Every trial runs in a fresh process, so
+# one engine's memory or a crash cannot leak into the next: its stop_event
+# is set after --timeout seconds, and a process that does not stop within
+# GRACE more seconds is killed. An engine that raises is an "error" and a
+# process that dies without a result a "crash", both with the reason under
+# "error". A pair that times out, fails or crashes is not tried again.
+#
+# Per engine and puzzle the suite records the status, the median and all
+# wall times, nodes checked, nodes per second, the peak RSS growth of the
+# trial process (KiB, none on Windows) and the nodes each pruning rule cut.
+# --out writes that as JSON; --baseline compares against such a file and
+# flags every pair that got slower than --threshold (and at least --min-time
+# seconds), checks more nodes than that, or stopped solving; the exit
+# status is then 1.
+#
+# python -m solvers.suite [--engines v3 v4 ...] [--boards grid_1 ...]
+#     [--puzzles FILE ...] [--trials 3] [--timeout 30] [--out FILE]
+#     [--baseline FILE] [--threshold 0.2] [--min-time 0.005]
+
+import argparse
+import json
+import multiprocessing as mp
+import platform
+import queue
+import signal
+import statistics
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from solvers import api, puzzles
+from solvers.grids import boards
+
+# seconds a stopped engine gets to return before its process is killed
+GRACE = 10
+
+
+def trial(engine, grid, walls, timeout, results):
+    """Runs in a fresh process: solves once and puts the record on results."""
+    stop_event = mp.Event()  # parallel hands it to its own workers
+    timer = threading.Timer(timeout, stop_event.set) if timeout else None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None
+    record = {"status": "error", "time": 0.0, "checked": 0, "pruned": {}}
+    if timer:
+        timer.start()
+    start = time.perf_counter()
+    try:
+        result = api.solve(grid, walls, engine, {"stop_event": stop_event})
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+    else:
+        if result["found"]:
+            record["status"] = "solved"
+        elif stop_event.is_set():
+            record["status"] = "timeout"
+        else:
+            record["status"] = "no_solution"
+        record["checked"] = result["checked"]
+        record["pruned"] = result.get("pruned", {})
+    record["time"] = time.perf_counter() - start
+    if timer:
+        timer.cancel()
+    if resource:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        record["peak_rss_kb"] = peak - rss
+    results.put(record)
+
+
+def exit_reason(code):
+    if code < 0:
+        return f"process killed by {signal.Signals(-code).name}"
+    return f"process exited with code {code}"
+
+
+def run_trial(engine, grid, walls, timeout):
+    ctx = mp.get_context("spawn")
+    results = ctx.Queue()
+    p = ctx.Process(target=trial, args=(engine, grid, walls, timeout, results))
+    start = time.perf_counter()
+    p.start()
+    wait = timeout + GRACE if timeout else None
+    record = None
+    while record is None:
+        try:
+            record = results.get(timeout=0.1)
+        except queue.Empty:
+            elapsed = time.perf_counter() - start
+            if not p.is_alive():
+                try:  # a record put just before the exit may still be in transit
+                    record = results.get(timeout=0.5)
+                except queue.Empty:
+                    record = {"status": "crash", "time": elapsed, "checked": 0}
+                    record.update(pruned={}, error=exit_reason(p.exitcode))
+            elif wait is not None and elapsed > wait:
+                # the engine ignored its stop_event
+                p.kill()
+                record = {"status": "timeout", "time": wait, "checked": 0}
+                record.update(pruned={}, error="killed")
+    p.join()
+    return record
+
+
+def bench(engine, grid, walls, trials, timeout):
+    """Summary record of up to trials runs of one engine on one puzzle."""
+    runs = []
+    for _ in range(trials):
+        runs.append(run_trial(engine, grid, walls, timeout))
+        if runs[-1]["status"] in ("timeout", "error", "crash"):
+            break
+    times = [run["time"] for run in runs]
+    peaks = [run.get("peak_rss_kb") for run in runs]
+    peaks = [peak for peak in peaks if peak is not None]
+    median = statistics.median(times)
+    middle = min(runs, key=lambda run: abs(run["time"] - median))
+    summary = {
+        "status": runs[-1]["status"],
+        "time": median,
+        "times": times,
+        "checked": middle["checked"],
+        "nodes_per_s": middle["checked"] / middle["time"] if middle["time"] else 0,
+        "peak_rss_kb": max(peaks) if peaks else None,
+        "pruned": middle["pruned"],
+    }
+    if "error" in runs[-1]:
+        summary["error"] = runs[-1]["error"]
+    return summary
+
+
+def registered(names=None, files=()):
+    """(name, grid, walls) of the solvers.grids boards (only names, if
+    given) and of every puzzle in files."""
+    for name, grid, walls in boards():
+        if not names or name in names:
+            yield name, grid, walls
+    for path in files:
+        for pid, grid, walls in puzzles.load(path):
+            yield f"{path}:{pid}", grid, walls
+
+
+def compare(results, baseline, threshold=0.2, min_time=0.005):
+    """Regression messages for results against a baseline run (both lists
+    of records as written by --out)."""
+    base = {(r["engine"], r["board"]): r for r in baseline}
+    regressions = []
+    for r in results:
+        old = base.get((r["engine"], r["board"]))
+        if old is None:
+            continue
+        where = f"{r['engine']} on {r['board']}"
+        if old["status"] == "solved" and r["status"] != "solved":
+            regressions.append(f"{where}: {r['status']} (was solved)")
+        if old["status"] != r["status"] or r["status"] in ("timeout", "error", "crash"):
+            continue  # times and nodes only compare like with like
+        if (
+            r["time"] > old["time"] * (1 + threshold)
+            and r["time"] - old["time"] >= min_time
+        ):
+            regressions.append(
+                f"{where}: {r['time']:.3f}s (was {old['time']:.3f}s, "
+                f"{r['time'] / old['time']:.2f}x)"
+            )
+        if old["checked"] and r["checked"] > old["checked"] * (1 + threshold):
+            regressions.append(f"{where}: {r['checked']} nodes (was {old['checked']})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every Zip engine.")
+    parser.add_argument("--engines", nargs="+", default=list(api.ENGINES))
+    parser.add_argument("--boards", nargs="+", help="solvers.grids names")
+    parser.add_argument("--puzzles", nargs="+", default=[], help="puzzle files")
+    parser.add_argument("--trials", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=30, help="per trial, s")
+    parser.add_argument("--out", help="write the results here (JSON)")
+    parser.add_argument("--baseline", help="results of an earlier --out")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    parser.add_argument("--min-time", type=float, default=0.005)
+    args = parser.parse_args()
+    for engine in args.engines:
+        api.get_engine(engine)  # unknown names fail before anything runs
+
+    print(
+        f"{'board':<10} {'engine':<9} {'status':<11} {'time (s)':>9} "
+        f"{'checked':>10} {'nodes/s':>11} {'rss (KiB)':>10}"
+    )
+    results = []
+    for name, grid, walls in registered(args.boards, args.puzzles):
+        for engine in args.engines:
+            record = bench(engine, grid, walls, args.trials, args.timeout)
+            results.append({"engine": engine, "board": name, **record})
+            print(
+                f"{name:<10} {engine:<9} {record['status']:<11} "
+                f"{record['time']:>9.3f} {record['checked']:>10} "
+                f"{record['nodes_per_s']:>11,.0f} {str(record['peak_rss_kb']):>10}"
+            )
+            if record["pruned"]:
+                print(f"{'':<21} pruned: {record['pruned']}")
+            if "error" in record:
+                print(f"{'':<21} {record['error']}")
+
+    if args.out:
+        meta = {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "trials": args.trials,
+            "timeout": args.timeout,
+        }
+        with open(args.out, "w") as f:
+            json.dump({"meta": meta, "results": results}, f, indent=1)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold, args.min_time)
+        for message in regressions:
+            print("REGRESSION", message)
+        print(f"{len(regressions)} regressions against {args.baseline}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
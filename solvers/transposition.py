@@ -0,0 +1,102 @@
+# failure memo for the v4 engine
+#
+# Two partial paths with the same head and the same visited cells (which also
+# fixes the next number, since numbers are taken in order) leave the same
+# subproblem, so a state whose subtree was searched without a solution can be
+# skipped when it comes up again. Keys are exact ints (visited * size + head),
+# so there are no false hits; Python hashes them in O(1) on our board sizes.
+
+from collections import OrderedDict
+
+# rough cost of one entry (key int + table slot), used to turn a MB cap into entries
+ENTRY_BYTES = 120
+
+POLICIES = ("lru", "depth")
+
+
+class TranspositionTable:
+    """Bounded set of failed states, or with values, a bounded map (the
+    solution counter keeps subtree counts in it).
+
+    policy="lru": evict the least recently used entry when full.
+    policy="depth": fixed slots indexed by hash; a slot is replaced only by a
+    state at the same or a shallower depth, since those root bigger subtrees.
+    """
+
+    def __init__(self, max_mb=32, policy="lru"):
+        if policy not in POLICIES:
+            raise ValueError(f"unknown eviction policy: {policy}")
+        self.policy = policy
+        self.capacity = max(1, int(max_mb * 2**20) // ENTRY_BYTES)
+        self.hits = self.misses = self.stores = self.evictions = 0
+        if policy == "lru":
+            self.entries = OrderedDict()
+        else:
+            self.keys = [None] * self.capacity
+            self.depths = [0] * self.capacity
+            self.values = [None] * self.capacity
+            self.filled = 0
+
+    def __len__(self):
+        if self.policy == "lru":
+            return len(self.entries)
+        return self.filled
+
+    def lookup(self, key):
+        """True if key is a known failure (counts a hit or a miss)."""
+        if self.policy == "lru":
+            found = key in self.entries
+            if found:
+                self.entries.move_to_end(key)
+        else:
+            found = self.keys[hash(key) % self.capacity] == key
+        if found:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return found
+
+    def get(self, key):
+        """Value stored with key, None if missing (counts a hit or a miss)."""
+        if self.policy == "lru":
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+        else:
+            slot = hash(key) % self.capacity
+            value = self.values[slot] if self.keys[slot] == key else None
+        if value is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return value
+
+    def store(self, key, depth, value=None):
+        self.stores += 1
+        if self.policy == "lru":
+            self.entries[key] = value
+            if len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+            return
+        slot = hash(key) % self.capacity
+        old = self.keys[slot]
+        if old is None:
+            self.keys[slot], self.depths[slot] = key, depth
+            self.values[slot] = value
+            self.filled += 1
+        elif old == key:
+            self.values[slot] = value
+        elif depth <= self.depths[slot]:
+            self.keys[slot], self.depths[slot] = key, depth
+            self.values[slot] = value
+            self.evictions += 1
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "size": len(self),
+        }
@@ -1,7 +1,10 @@
-import matplotlib.pyplot as plt
+# drawing helpers; matplotlib is imported on the first call, so solvers that
+# import this module do not pay for it unless they render
 
 
 def draw_path(path, grid, filename="solution.png"):
+    import matplotlib.pyplot as plt
+
     N = len(grid)
     fig, ax = plt.subplots()
 
@@ -52,6 +55,8 @@ def draw_path(path, grid, filename="solution.png"):
 
 
 def draw_path_walls(path, grid, walls, filename="solution_walls.png"):
+    import matplotlib.pyplot as plt
+
     N = len(grid)
     fig, ax = plt.subplots()
 
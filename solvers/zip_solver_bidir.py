@@ -0,0 +1,181 @@
+# meet in the middle: grow half-paths from both ends and join them
+#
+# The forward half starts at 1 and takes the numbers in order; the backward
+# half starts at the last number and takes them in reverse, which is just the
+# forward search on the same board with the numbers flipped (v -> start + end
+# - v). Both halves come from the v4 search with split_depth, so they pass the
+# same pruning rules. Forward halves are indexed by (next cell, visited mask,
+# next number); a backward half ending in cell q with visited mask B matches
+# every forward half whose next cell is q and whose visited cells are exactly
+# the rest of the board, and whose next number is the lowest one B holds.
+# The forward side is enumerated in full and indexed, the backward side is
+# streamed against the index and stops at the first join. So the forward side
+# is kept short (meet=0.2 of the board by default; an even split has to
+# enumerate far more forward halves than a one-sided DFS ever visits). The
+# index is capped; past the cap we fall back to plain v4.
+
+from solvers.ordering import DEFAULT_ORDERING
+from solvers.pruning import DEFAULT_RULES, feasible
+from solvers.zip_solver_v4 import Board, search, unroll
+from solvers.zip_solver_v4 import solve as solve_v4
+
+
+def half_paths(board, depth, rules, ordering, stop_event, max_entries=None, match=None):
+    """Frontier frames (next cell, next number, path, visited) of the v4 search
+    cut at path length depth; path is a node chain (see zip_solver_v4.unroll).
+    With max_entries the search gives up once it has more frames than that.
+    With match, frames are not kept but passed to match(frame) as they come,
+    and the search ends at the first frame it returns a solution for. Returns
+    (frames, solution, checked, pruned): frames is None if the search gave up
+    or was stopped, solution is the full path (as cell indices) if one turned
+    up."""
+    frontier = []
+    found = None
+    overflow = False
+
+    def drain(stack):
+        # called every thousand checks and once at the end
+        nonlocal found, overflow
+        if match is not None:
+            for frame in frontier:
+                found = match(frame)
+                if found is not None:
+                    break
+            frontier.clear()
+        elif max_entries is not None and len(frontier) > max_entries:
+            overflow = True
+        if found is not None or overflow or (
+            stop_event is not None and stop_event.is_set()
+        ):
+            overflow = overflow or found is None
+            stack.clear()
+
+    stack = [(board.positions[board.start], board.start, None, 0)]
+    solution, checked, pruned = search(
+        board,
+        stack,
+        rules=rules,
+        ordering=ordering,
+        progress_interval=1000,
+        split_depth=depth,
+        frontier=frontier,
+        share=drain,
+    )
+    if solution is None and not overflow:
+        drain(stack)
+    if solution is None:
+        solution = found
+    return (None if overflow else frontier), solution, checked, pruned
+
+
+def solve(
+    grid,
+    walls,
+    rules=DEFAULT_RULES,
+    ordering=DEFAULT_ORDERING,
+    meet=0.2,
+    max_entries=500000,
+    on_progress=None,
+    stop_event=None,
+    progress_interval=30000,
+    **options,
+):
+    """Same result dict as zip_solver_v4.solve plus "bidir": {"forward",
+    "backward", "joined", "fallback"} (half-paths indexed, backward half-paths
+    tried, forward halves the winning one matched, whether v4 took over).
+    meet is the share of the board covered by forward halves. max_entries caps
+    the forward index; past it the board is solved with zip_solver_v4.solve
+    (passing on_progress and options such as tt_mb)."""
+    board = Board(grid, walls)
+    result = {"found": False, "solution": None, "checked": 0, "pruned": {}}
+    if board.start is None or not feasible(board):
+        return result
+    stats = {"forward": 0, "backward": 0, "joined": 0, "fallback": False}
+    result["bidir"] = stats
+
+    def merge(checked, pruned):
+        result["checked"] += checked
+        for name, n in pruned.items():
+            result["pruned"][name] = result["pruned"].get(name, 0) + n
+
+    def fallback():
+        stats["fallback"] = True
+        single = solve_v4(
+            grid,
+            walls,
+            rules=rules,
+            ordering=ordering,
+            on_progress=on_progress,
+            stop_event=stop_event,
+            progress_interval=progress_interval,
+            **options,
+        )
+        merge(single.pop("checked"), single.pop("pruned"))
+        result.update(single)
+        return result
+
+    if board.start == board.end:
+        return fallback()
+
+    # forward halves: depth cells, joined to backward halves of size - depth
+    depth = max(1, min(board.size - 1, round(board.size * meet)))
+    forward, solution, checked, pruned = half_paths(
+        board, depth, rules, ordering, stop_event, max_entries=max_entries
+    )
+    merge(checked, pruned)
+    if solution is not None:
+        result.update(found=True, solution=board.to_cells(solution))
+        return result
+    if forward is None:
+        return result if stop_event is not None and stop_event.is_set() else fallback()
+    stats["forward"] = len(forward)
+
+    index = {}
+    for j, next_search, path, visited in forward:
+        index.setdefault((j, visited, next_search), []).append(path)
+
+    flip = board.start + board.end
+    flipped = [[flip - v if v else 0 for v in row] for row in grid]
+    backward = 0
+
+    def match(frame):
+        nonlocal backward
+        _, next_search, path, visited = frame
+        backward += 1
+        # the backward half holds the numbers from flip - next_search + 1 up
+        key = (path[0], board.full & ~visited, flip - next_search + 1)
+        halves = index.get(key)
+        if halves:
+            stats["joined"] = len(halves)
+            return unroll(halves[0]) + unroll(path)[::-1]
+        return None
+
+    _, solution, checked, pruned = half_paths(
+        Board(flipped, walls),
+        board.size - depth,
+        rules,
+        ordering,
+        stop_event,
+        match=match,
+    )
+    merge(checked, pruned)
+    stats["backward"] = backward
+    if solution is not None:
+        if not stats["joined"]:
+            # the backward search reached the start before the cut
+            solution = solution[::-1]
+        result.update(found=True, solution=board.to_cells(solution))
+    return result
+
+
+if __name__ == "__main__":
+    from solvers.grids import grid, walls
+    from solvers.utils import draw_path_walls
+
+    result = solve(grid, walls)
+    print("Half-paths:", result["bidir"])
+    if result["found"]:
+        print("Found solution:", result["solution"])
+        draw_path_walls(result["solution"], grid, walls, "sol.png")
+    else:
+        print("No solution after", result["checked"], "checks")
@@ -0,0 +1,251 @@
+# frontier dp (plug dp): sweep the cells row by row and keep, instead of paths,
+# the set of ways the finished part of the board can connect to the rest
+#
+# The frontier is the N down-edges leaving the swept part plus the edge going
+# right from the last swept cell. Each edge (plug) belongs to a path fragment.
+# A fragment has two plugs, or one if its other end is the start or end cell.
+# Every plug carries its fragment's tag (lo, hi, role): the range of numbers
+# the fragment holds, which must stay contiguous, and which way they run.
+# role "H": the numbers go up towards this plug, "L": they go down, "N": not
+# fixed yet (zero or one number). Fragments are joined only if their numbers
+# still line up in order, so waypoint order is enforced during the sweep.
+# The work per cell is the number of distinct frontiers, which depends on the
+# board width, not on how big the DFS tree would be.
+
+from solvers.zip_solver_v4 import Board
+
+FIRST_ROLE = {1: "L", -1: "H", 0: "N"}
+SECOND_ROLE = {1: "H", -1: "L", 0: "N"}
+DIRECTION = {"H": 1, "L": -1, "N": 0}
+
+
+def toward(plug):
+    """Numbers of the plug's fragment read towards the plug: (lo, hi, dir) or None."""
+    _, lo, hi, role = plug
+    return None if lo is None else (lo, hi, DIRECTION[role])
+
+
+def away(plug):
+    _, lo, hi, role = plug
+    return None if lo is None else (lo, hi, -DIRECTION[role])
+
+
+def join(p, q):
+    """Concatenate two number runs, False if they do not continue each other."""
+    if p is False or q is False:
+        return False
+    if p is None:
+        return q
+    if q is None:
+        return p
+    plo, phi, pd = p
+    qlo, qhi, qd = q
+    if pd >= 0 and qd >= 0 and phi + 1 == qlo:
+        return (plo, qhi, 1)
+    if pd <= 0 and qd <= 0 and plo - 1 == qhi:
+        return (qlo, phi, -1)
+    return False
+
+
+def normalize(state):
+    """Relabel fragments in order of first appearance so equal frontiers match."""
+    labels = {}
+    out = []
+    for plug in state:
+        if plug:
+            label = labels.setdefault(plug[0], len(labels) + 1)
+            plug = (label,) + plug[1:]
+        out.append(plug)
+    return tuple(out)
+
+
+def retag(state, label, run, role, new_label=None):
+    """Sets the tag of the remaining plug of `label` (the fragment's other end),
+    moving it to new_label if given. Returns False if the fragment has no
+    other plug."""
+    for k, plug in enumerate(state):
+        if plug and plug[0] == label:
+            lo, hi = (None, None) if run is None else run[:2]
+            state[k] = (label if new_label is None else new_label, lo, hi, role)
+            return True
+    return False
+
+
+def transitions(board, state, i):
+    """Yields (new_state, (down, right)) for every way to pass through cell i."""
+    N = board.N
+    c = i % N
+    v = board.values[i]
+    cell = (v, v, 0) if v else None
+    is_start = v != 0 and v == board.start
+    is_end = v != 0 and v == board.end
+    degree = 1 if is_start or is_end else 2
+    can_down = board.can_down >> i & 1
+    can_right = board.can_right >> i & 1
+    last = i == board.size - 1
+    up, left = state[c], state[N]
+    fresh = 2 * N + 2  # unused label, fixed by normalize()
+
+    incoming = [p for p in (up, left) if p]
+
+    if not incoming:
+        if degree == 2:
+            if can_down and can_right:
+                lo, hi = (v, v) if v else (None, None)
+                new = list(state)
+                new[c] = new[N] = (fresh, lo, hi, "N")
+                yield new, (1, 1)
+            return
+        plug = (fresh, v, v, "H" if is_start else "L")
+        if can_down:
+            new = list(state)
+            new[c], new[N] = plug, 0
+            yield new, (1, 0)
+        if can_right:
+            new = list(state)
+            new[c], new[N] = 0, plug
+            yield new, (0, 1)
+        return
+
+    if len(incoming) == 1:
+        p = incoming[0]
+        run = join(toward(p), cell)
+        if run is False:
+            return
+        d = run[2] if run else 0
+        new = list(state)
+        new[c] = new[N] = 0
+        if degree == 1:
+            # the fragment ends in the start / end cell
+            if is_start and run[0] != v or is_end and run[1] != v:
+                return
+            role = "H" if is_start else "L"
+            if not retag(new, p[0], run, role):
+                # it was already tied to the other endpoint: the path is complete
+                if not last or any(new):
+                    return
+            yield new, (0, 0)
+            return
+        lo, hi = (None, None) if run is None else run[:2]
+        if not retag(new, p[0], run, FIRST_ROLE[d]):
+            # endpoint fragment: the open end keeps its direction
+            role = p[3]
+        else:
+            role = SECOND_ROLE[d]
+        plug = (p[0], lo, hi, role)
+        if can_down:
+            out = list(new)
+            out[c] = plug
+            yield out, (1, 0)
+        if can_right:
+            out = list(new)
+            out[N] = plug
+            yield out, (0, 1)
+        return
+
+    if degree == 1 or up[0] == left[0]:
+        # an endpoint cannot take two edges, and joining a fragment to itself
+        # would close a loop
+        return
+    run = join(join(toward(up), cell), away(left))
+    if run is False:
+        return
+    d = run[2] if run else 0
+    new = list(state)
+    new[c] = new[N] = 0
+    first = retag(new, up[0], run, FIRST_ROLE[d])
+    second = retag(new, left[0], run, SECOND_ROLE[d], new_label=up[0])
+    if not first and not second:
+        # start fragment met end fragment: the path is complete
+        if not last or any(new):
+            return
+    yield new, (0, 0)
+
+
+def sweep(board, stop_event=None):
+    """Runs the dp over all cells. Returns (count, witness, states) where count
+    is the number of solutions, witness the (down, right) choices of one of
+    them (last cell first, as a linked list) and states the number of frontier
+    states processed; None if stopped."""
+    empty = (0,) * (board.N + 1)
+    layer = {empty: [1, None]}
+    states = 0
+    for i in range(board.size):
+        if stop_event is not None and stop_event.is_set():
+            return None
+        nxt = {}
+        for state, (count, witness) in layer.items():
+            states += 1
+            for new, choice in transitions(board, state, i):
+                key = normalize(new)
+                entry = nxt.get(key)
+                if entry is None:
+                    nxt[key] = [count, (choice, witness)]
+                else:
+                    entry[0] += count
+        layer = nxt
+        if not layer:
+            break
+    count, witness = layer.get(empty, [0, None])
+    return count, witness, states
+
+
+def unroll(board, witness):
+    """Solution path [(r, c), ...] from the witness of sweep()."""
+    N = board.N
+    adj = {i: [] for i in range(board.size)}
+    i = board.size - 1
+    while witness is not None:
+        (down, right), witness = witness
+        if down:
+            adj[i].append(i + N)
+            adj[i + N].append(i)
+        if right:
+            adj[i].append(i + 1)
+            adj[i + 1].append(i)
+        i -= 1
+    path = [board.positions[board.start]]
+    prev = None
+    while len(path) < board.size:
+        cur = path[-1]
+        nxt = [j for j in adj[cur] if j != prev]
+        prev = cur
+        path.append(nxt[0])
+    return board.to_cells(path)
+
+
+def solve(grid, walls, stop_event=None):
+    """Same result dict as zip_solver_v4.solve plus "count", the number of
+    solutions. "checked" is the number of frontier states processed."""
+    board = Board(grid, walls)
+    result = {"found": False, "solution": None, "checked": 0, "pruned": {}, "count": 0}
+    if board.start is None:
+        return result
+    if board.start == board.end:
+        # a single number: only a one-cell board is covered by its path
+        if board.size == 1:
+            result.update(found=True, solution=[(0, 0)], count=1)
+        return result
+    swept = sweep(board, stop_event)
+    if swept is None:
+        return result
+    count, witness, states = swept
+    result.update(checked=states, count=count)
+    if count:
+        result.update(found=True, solution=unroll(board, witness))
+    return result
+
+
+def count_solutions(grid, walls):
+    return solve(grid, walls)["count"]
+
+
+if __name__ == "__main__":
+    from solvers.grids import grid, walls
+    from solvers.utils import draw_path_walls
+
+    result = solve(grid, walls)
+    print("Solutions:", result["count"])
+    if result["found"]:
+        print("Found solution:", result["solution"])
+        draw_path_walls(result["solution"], grid, walls, "sol.png")
@@ -0,0 +1,99 @@
+# constraint model instead of search: OR-Tools CP-SAT (pip install ortools)
+#
+# The path is a circuit through every cell plus a dummy node (end -> dummy ->
+# start), built with AddCircuit over the open moves, so walls are simply
+# missing arcs. Each cell gets a step number; a used arc i -> j forces
+# step[j] == step[i] + 1 and consecutive numbers must have increasing steps.
+
+import threading
+
+from solvers.zip_solver_v4 import Board
+
+
+def build_model(board):
+    """Returns (model, step) or None unless every number from the first to
+    the last appears exactly once (the DFS engines cannot solve the others
+    either, and the circuit would skip a repeated number)."""
+    from ortools.sat.python import cp_model
+
+    if board.start is None or not board.consecutive:
+        return None
+
+    size = board.size
+    start = board.positions[board.start]
+    end = board.positions[board.end]
+    model = cp_model.CpModel()
+    step = [model.NewIntVar(0, size - 1, f"step{i}") for i in range(size)]
+
+    dummy = size
+    circuit = [(dummy, start, model.NewConstant(1)), (end, dummy, model.NewConstant(1))]
+    for i in range(size):
+        if i == end:
+            continue
+        for j in board.neighbors[i]:
+            if j == start:
+                continue
+            lit = model.NewBoolVar(f"x{i}_{j}")
+            circuit.append((i, j, lit))
+            model.Add(step[j] == step[i] + 1).OnlyEnforceIf(lit)
+    model.AddCircuit(circuit)
+
+    model.Add(step[start] == 0)
+    model.Add(step[end] == size - 1)
+    for v in range(board.start, board.end):
+        model.Add(step[board.positions[v]] < step[board.positions[v + 1]])
+    return model, step
+
+
+def solve(grid, walls, time_limit=None, num_workers=0, stop_event=None):
+    """Same result dict as zip_solver_v4.solve ("checked" is the number of
+    CP-SAT branches). time_limit is in seconds; num_workers=0 lets CP-SAT use
+    every core. Setting stop_event interrupts the solver."""
+    try:
+        from ortools.sat.python import cp_model
+    except ImportError:
+        raise ImportError("the sat engine needs OR-Tools: pip install ortools")
+
+    board = Board(grid, walls)
+    result = {"found": False, "solution": None, "checked": 0, "pruned": {}}
+    built = build_model(board)
+    if built is None:
+        return result
+    model, step = built
+
+    solver = cp_model.CpSolver()
+    if time_limit is not None:
+        solver.parameters.max_time_in_seconds = time_limit
+    if num_workers:
+        solver.parameters.num_workers = num_workers
+
+    finished = threading.Event()
+    if stop_event is not None:
+
+        def watch():
+            while not finished.wait(0.1):
+                if stop_event.is_set():
+                    solver.StopSearch()
+                    return
+
+        threading.Thread(target=watch, daemon=True).start()
+
+    status = solver.Solve(model)
+    finished.set()
+    result["checked"] = solver.NumBranches()
+    if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        order = sorted(range(board.size), key=lambda i: solver.Value(step[i]))
+        result.update(found=True, solution=board.to_cells(order))
+    return result
+
+
+if __name__ == "__main__":
+    from solvers.grids import grid, walls
+    from solvers.utils import draw_path_walls
+
+    result = solve(grid, walls)
+    if result["found"]:
+        print("Found solution:", result["solution"])
+        draw_path_walls(result["solution"], grid, walls, "sol.png")
+    else:
+        print("No solution")
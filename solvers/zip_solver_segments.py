@@ -0,0 +1,183 @@
+# segment-wise search: the path is a chain of segments (1 -> 2, 2 -> 3, ...),
+# each solved as its own subproblem instead of one long DFS from 1
+#
+# A segment's candidates are the sub-paths between its two numbers through
+# free cells. Segments are fixed one at a time, always the one with the fewest
+# candidates left, and a fixed segment's cells are taken out of the shared
+# occupancy mask for all the others. So a segment squeezed between fixed ones
+# is settled early and never re-derived while an unrelated segment changes.
+#
+# A set of fixed segments is only kept if the rest can still be filled: every
+# free region has to be entered and left by one unfixed segment (both of its
+# numbers border the region), every unfixed segment needs such a region unless
+# its numbers touch, and no free cell may be a dead end.
+
+import itertools
+
+from solvers.zip_solver_v4 import Board
+
+
+class Segments:
+    """Segments of a board and the feasibility test shared by the search."""
+
+    def __init__(self, board):
+        self.board = board
+        values = range(board.start, board.end + 1)
+        self.ends = [(board.positions[v], board.positions[v + 1]) for v in values[:-1]]
+        self.occupied = sum(1 << board.positions[v] for v in values)
+        self.nodes = 0  # partial sub-paths expanded by candidates()
+
+    def pairs(self, unfixed):
+        return [self.ends[s] for s in unfixed]
+
+    def feasible(self, free, pairs):
+        """Can the free cells still be split among paths joining each (a, b)
+        of pairs (the unfixed segments, plus the head of a sub-path being
+        built and its target)?"""
+        board = self.board
+        N = board.N
+
+        # every free cell needs two open neighbors (free cells or path ends)
+        # to be passed through
+        open_cells = free
+        for a, b in pairs:
+            open_cells |= 1 << a | 1 << b
+        d = (open_cells >> N) & board.can_down
+        u = (open_cells << N) & board.can_up
+        r = (open_cells >> 1) & board.can_right
+        l = (open_cells << 1) & board.can_left
+        two = (d & u) | (d & r) | (d & l) | (u & r) | (u & l) | (r & l)
+        if free & ~two:
+            return False
+
+        served = set()
+        left = free
+        while left:
+            region = board.flood(left & -left, free)
+            left &= ~region
+            border = board.expand(region)
+            users = [k for k, (a, b) in enumerate(pairs) if border >> a & border >> b & 1]
+            if not users:
+                return False
+            served.update(users)
+        return all(
+            k in served or b in board.neighbors[a] for k, (a, b) in enumerate(pairs)
+        )
+
+    def candidates(self, s, free, unfixed):
+        """Lazily yields (cells, mask) for every sub-path of segment s through
+        free cells that leaves the other unfixed segments a feasible board.
+        cells excludes both numbers. Partial sub-paths are cut as soon as the
+        board, with the head as one more open end, is infeasible."""
+        board = self.board
+        a, b = self.ends[s]
+        rest = self.pairs(t for t in unfixed if t != s)
+        if b in board.neighbors[a] and self.feasible(free, rest):
+            yield [], 0
+        stack = [(j, [], 0) for j in board.neighbors[a] if free >> j & 1]
+        while stack:
+            i, cells, mask = stack.pop()
+            self.nodes += 1
+            cells = cells + [i]
+            mask |= 1 << i
+            remaining = free & ~mask
+            if not self.feasible(remaining, rest + [(i, b)]):
+                continue
+            if b in board.neighbors[i] and self.feasible(remaining, rest):
+                yield cells, mask
+            for j in board.neighbors[i]:
+                if remaining >> j & 1:
+                    stack.append((j, cells, mask))
+
+
+def solve(
+    grid,
+    walls,
+    limit=2,
+    on_progress=None,
+    stop_event=None,
+    progress_interval=30000,
+):
+    """Same result dict as zip_solver_v4.solve ("checked" counts partial
+    sub-paths). Before each choice up to `limit` candidates of every open
+    segment are generated and the one with the fewest is fixed next; ties go
+    to the lower numbers. limit is at least 2: with 1 the counts could only
+    tell segments without any sub-path left from all the others."""
+    board = Board(grid, walls)
+    result = {"found": False, "solution": None, "checked": 0, "pruned": {}}
+    if board.start is None or not board.consecutive:
+        return result
+    if board.start == board.end:
+        if board.size == 1:
+            result.update(found=True, solution=[(0, 0)])
+        return result
+
+    limit = max(limit, 2)
+    segs = Segments(board)
+    count = len(segs.ends)
+    chosen = [None] * count
+    last_update = 0
+    stopped = False
+
+    def progress():
+        # the fixed segments joined up from number 1, as far as they go
+        path = [segs.ends[0][0]]
+        for s in range(count):
+            if chosen[s] is None:
+                break
+            path += chosen[s] + [segs.ends[s][1]]
+        on_progress({"checked": segs.nodes, "path": board.to_cells(path)})
+
+    def search(free, unfixed):
+        nonlocal last_update, stopped
+        if not unfixed:
+            return free == 0
+
+        # pick the segment with the fewest candidates; a list shorter than
+        # limit is complete, otherwise the rest is generated on demand
+        best = None
+        for s in unfixed:
+            gen = segs.candidates(s, free, unfixed)
+            head = list(itertools.islice(gen, limit))
+            if best is None or len(head) < len(best[1]):
+                best = (s, head, gen)
+            if not head:
+                break
+        s, head, gen = best
+        rest = [t for t in unfixed if t != s]
+
+        for cells, mask in itertools.chain(head, gen):
+            if segs.nodes - last_update >= progress_interval:
+                last_update = segs.nodes
+                if stop_event is not None and stop_event.is_set():
+                    stopped = True
+                if on_progress is not None:
+                    progress()
+            if stopped:
+                return False
+            chosen[s] = cells
+            if search(free & ~mask, rest):
+                return True
+            chosen[s] = None
+        return False
+
+    free = board.full & ~segs.occupied
+    if search(free, list(range(count))):
+        path = [segs.ends[0][0]]
+        for s in range(count):
+            path += chosen[s] + [segs.ends[s][1]]
+        result.update(found=True, solution=board.to_cells(path))
+    result["checked"] = segs.nodes
+    return result
+
+
+if __name__ == "__main__":
+    from solvers.grids import grid, walls
+    from solvers.utils import draw_path_walls
+
+    result = solve(grid, walls)
+    if result["found"]:
+        print("Found solution:", result["solution"])
+        draw_path_walls(result["solution"], grid, walls, "sol.png")
+    else:
+        print("No solution after", result["checked"], "checks")
@@ -1,63 +1,85 @@
 # brute dfs (doesnt support walls)
 
-from solvers.grids import grid
+from random import random
 
-N = len(grid)
-start = 1
 TEMP_DRAW_RATE = 0.00
 
-end = max([max(row) for row in grid])
 
-visited = set()
-path = []
+def solve(grid, walls=(), stop_event=None):
+    """{"found", "solution", "checked"}; walls are not supported."""
+    if walls:
+        raise ValueError("v1 does not support walls")
+    N = len(grid)
+    start = 1
+    end = max([max(row) for row in grid])
 
-from solvers.utils import draw_path
-from random import random
+    visited = set()
+    path = []
+    checked = 0
+    stopped = False
 
+    def dfs(r, c, next_search):
+        nonlocal checked, stopped
+        if stopped:
+            return False
+        if r < 0 or c < 0 or r >= N or c >= N:
+            return False
 
-def dfs(r, c, next_search):
-    if r < 0 or c < 0 or r >= N or c >= N:
-        return False
-
-    if (r, c) in visited:
-        return False
+        if (r, c) in visited:
+            return False
 
-    new_next = next_search
-    if next_search == grid[r][c]:
-        if end == next_search:
-            if len(visited) == N * N - 1:
-                path.append((r, c))
-                print(path)
-                draw_path(path, grid, "sol.png")
-                return True
+        checked += 1
+        if checked % 10000 == 0 and stop_event is not None and stop_event.is_set():
+            stopped = True
+            return False
+        new_next = next_search
+        if next_search == grid[r][c]:
+            if end == next_search:
+                if len(visited) == N * N - 1:
+                    path.append((r, c))
+                    return True
+                else:
+                    return False
             else:
-                return False
-        else:
-            new_next += 1
-            if random() < TEMP_DRAW_RATE:
-                draw_path(path + [(r, c)], grid, "sol-temp.png")
+                new_next += 1
+                if random() < TEMP_DRAW_RATE:
+                    from solvers.utils import draw_path
 
-    elif grid[r][c] != 0:
-        return False
+                    draw_path(path + [(r, c)], grid, "sol-temp.png")
+
+        elif grid[r][c] != 0:
+            return False
+
+        path.append((r, c))
+        visited.add((r, c))
 
-    path.append((r, c))
-    visited.add((r, c))
+        if dfs(r + 1, c, new_next):
+            return True
+        if dfs(r, c + 1, new_next):
+            return True
+        if dfs(r - 1, c, new_next):
+            return True
+        if dfs(r, c - 1, new_next):
+            return True
+        path.pop()
+        visited.remove((r, c))
+
+        return False
 
-    if dfs(r + 1, c, new_next):
-        return True
-    if dfs(r, c + 1, new_next):
-        return True
-    if dfs(r - 1, c, new_next):
-        return True
-    if dfs(r, c - 1, new_next):
-        return True
-    path.pop()
-    visited.remove((r, c))
+    for r, row in enumerate(grid):
+        for c, x in enumerate(row):
+            if x == start and dfs(r, c, start):
+                return {"found": True, "solution": path, "checked": checked}
+    return {"found": False, "solution": None, "checked": checked}
 
-    return False
 
+if __name__ == "__main__":
+    from solvers.grids import grid
+    from solvers.utils import draw_path
 
-for r, row in enumerate(grid):
-    for c, x in enumerate(row):
-        if x == start:
-            dfs(r, c, start)
+    result = solve(grid)
+    if result["found"]:
+        print(result["solution"])
+        draw_path(result["solution"], grid, "sol.png")
+    else:
+        print("No solution after", result["checked"], "checks")
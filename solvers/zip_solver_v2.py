@@ -1,39 +1,39 @@
 # dfs stack and pruning base on manhatten dist
 
-from solvers.grids import grid, walls
+from random import random
 
 TEMP_DRAW_RATE = 0.00
 
-N = len(grid)
-start = 1
-
-end = max([max(row) for row in grid])
-
-from solvers.utils import draw_path, draw_path_walls
-from random import random
 
-positions = {grid[r][c]: (r, c) for r in range(N) for c in range(N) if grid[r][c] != 0}
-
-neighbors = {
-    (r, c): [
-        (nr, nc)
-        for nr, nc in [(r + 1, c), (r - 1, c), (r, c + 1), (r, c - 1)]
-        if 0 <= nr < N and 0 <= nc < N
-    ]
-    for r in range(N)
-    for c in range(N)
-}
-
-for w in walls:
-    for r, c in neighbors:
-        neighbors[(r, c)] = [
+def neighbors_of(grid, walls):
+    """{cell: [open neighbouring cells]}"""
+    N = len(grid)
+    walls = {tuple(map(tuple, w)) for w in walls}
+    return {
+        (r, c): [
             (nr, nc)
-            for (nr, nc) in neighbors[(r, c)]
-            if ((r, c), (nr, nc)) not in walls and ((nr, nc), (r, c)) not in walls
+            for nr, nc in [(r + 1, c), (r - 1, c), (r, c + 1), (r, c - 1)]
+            if 0 <= nr < N
+            and 0 <= nc < N
+            and ((r, c), (nr, nc)) not in walls
+            and ((nr, nc), (r, c)) not in walls
         ]
+        for r in range(N)
+        for c in range(N)
+    }
+
+
+def solve(grid, walls=(), stop_event=None):
+    """{"found", "solution", "checked"}"""
+    N = len(grid)
+    start = 1
+    end = max([max(row) for row in grid])
+    positions = {
+        grid[r][c]: (r, c) for r in range(N) for c in range(N) if grid[r][c] != 0
+    }
+    neighbors = neighbors_of(grid, walls)
+    checked = 0
 
-
-def solve():
     sr, sc = positions[start]
 
     # stack holds: (r, c, next_search, path, visited_set)
@@ -45,19 +45,23 @@ def solve():
         if (r, c) in visited:
             continue
 
+        checked += 1
+        if checked % 10000 == 0 and stop_event is not None and stop_event.is_set():
+            break
+
         new_next = next_search
         if grid[r][c] == next_search:
             if next_search == end:
                 if len(visited) == N * N - 1:  # all cells covered
                     sol = path + [(r, c)]
-                    print("Found solution:", sol)
-                    draw_path_walls(sol, grid, walls, "sol.png")
-                    return True
+                    return {"found": True, "solution": sol, "checked": checked}
                 else:
                     continue
             else:
                 new_next += 1
                 if random() < TEMP_DRAW_RATE:
+                    from solvers.utils import draw_path
+
                     draw_path(path + [(r, c)], grid, "sol-temp.png")
 
         elif grid[r][c] != 0:
@@ -76,7 +80,16 @@ def solve():
         for nr, nc in neighbors[(r, c)]:
             stack.append((nr, nc, new_next, new_path, new_visited))
 
-    return False
+    return {"found": False, "solution": None, "checked": checked}
+
 
+if __name__ == "__main__":
+    from solvers.grids import grid, walls
+    from solvers.utils import draw_path_walls
 
-solve()
+    result = solve(grid, walls)
+    if result["found"]:
+        print("Found solution:", result["solution"])
+        draw_path_walls(result["solution"], grid, walls, "sol.png")
+    else:
+        print("No solution after", result["checked"], "checks")
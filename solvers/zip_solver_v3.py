@@ -1,69 +1,56 @@
 # v2 + connectivity pruning
+#
+# Kept as the reference search, without the failure memo: v4 runs the same
+# search on bitboards, so v3 with a memo is
+# zip_solver_v4.solve(grid, walls, rules=V3_RULES, tt_mb=32).
 
-from solvers.grids import grid, walls
+from collections import deque
+from random import random
 
-N = len(grid)
-start = 1
+from solvers.zip_solver_v2 import neighbors_of
 
 TEMP_DRAW_RATE = 0.00
 
-end = max([max(row) for row in grid])
-
-from solvers.utils import draw_path, draw_path_walls
-from random import random
 
-positions = {grid[r][c]: (r, c) for r in range(N) for c in range(N) if grid[r][c] != 0}
-
-neighbors = {
-    (r, c): [
-        (nr, nc)
-        for nr, nc in [(r + 1, c), (r - 1, c), (r, c + 1), (r, c - 1)]
-        if 0 <= nr < N and 0 <= nc < N
-    ]
-    for r in range(N)
-    for c in range(N)
-}
-
-for w in walls:
-    for r, c in neighbors:
-        neighbors[(r, c)] = [
-            (nr, nc)
-            for (nr, nc) in neighbors[(r, c)]
-            if ((r, c), (nr, nc)) not in walls and ((nr, nc), (r, c)) not in walls
-        ]
-
-
-def is_connected(r, c, new_next, visited):
-    """Flood fill from (r,c) through all unvisited cells + future targets.
-    Returns True if all required cells are reachable."""
-    from collections import deque
-
-    # Build the set of unvisited required cells (including next targets and empties)
-    required = {
-        (rr, cc)
-        for rr in range(N)
-        for cc in range(N)
-        if (rr, cc) not in visited and (grid[rr][cc] == 0 or grid[rr][cc] >= new_next)
+def solve(grid, walls=(), stop_event=None):
+    """{"found", "solution", "checked"}"""
+    N = len(grid)
+    start = 1
+    end = max([max(row) for row in grid])
+    positions = {
+        grid[r][c]: (r, c) for r in range(N) for c in range(N) if grid[r][c] != 0
     }
+    neighbors = neighbors_of(grid, walls)
+    checked = 0
+
+    def is_connected(r, c, new_next, visited):
+        """Flood fill from (r,c) through all unvisited cells + future targets.
+        Returns True if all required cells are reachable."""
+        # Build the set of unvisited required cells (including next targets and empties)
+        required = {
+            (rr, cc)
+            for rr in range(N)
+            for cc in range(N)
+            if (rr, cc) not in visited
+            and (grid[rr][cc] == 0 or grid[rr][cc] >= new_next)
+        }
+
+        if not required:
+            return True
+
+        q = deque([(r, c)])
+        seen = {(r, c)}
+
+        while q:
+            cr, cc = q.popleft()
+            for nr, nc in neighbors[(cr, cc)]:
+                if (nr, nc) in required and (nr, nc) not in seen:
+                    seen.add((nr, nc))
+                    q.append((nr, nc))
+
+        # Connected if all required cells were reached
+        return required.issubset(seen)
 
-    if not required:
-        return True
-
-    q = deque([(r, c)])
-    seen = {(r, c)}
-
-    while q:
-        cr, cc = q.popleft()
-        for nr, nc in neighbors[(cr, cc)]:
-            if (nr, nc) in required and (nr, nc) not in seen:
-                seen.add((nr, nc))
-                q.append((nr, nc))
-
-    # Connected if all required cells were reached
-    return required.issubset(seen)
-
-
-def solve():
     sr, sc = positions[start]
 
     # stack holds: (r, c, next_search, path, visited_set)
@@ -75,19 +62,23 @@ def solve():
         if (r, c) in visited:
             continue
 
+        checked += 1
+        if checked % 10000 == 0 and stop_event is not None and stop_event.is_set():
+            break
+
         new_next = next_search
         if grid[r][c] == next_search:
             if next_search == end:
                 if len(visited) == N * N - 1:  # all cells covered
                     sol = path + [(r, c)]
-                    print("Found solution:", sol)
-                    draw_path_walls(sol, grid, walls, "sol.png")
-                    return True
+                    return {"found": True, "solution": sol, "checked": checked}
                 else:
                     continue
             else:
                 new_next += 1
                 if random() < TEMP_DRAW_RATE:
+                    from solvers.utils import draw_path
+
                     draw_path(path + [(r, c)], grid, "sol-temp.png")
 
         elif grid[r][c] != 0:
@@ -110,7 +101,16 @@ def solve():
         for nr, nc in neighbors[(r, c)]:
             stack.append((nr, nc, new_next, new_path, new_visited))
 
-    return False
+    return {"found": False, "solution": None, "checked": checked}
+
 
+if __name__ == "__main__":
+    from solvers.grids import grid, walls
+    from solvers.utils import draw_path_walls
 
-solve()
+    result = solve(grid, walls)
+    if result["found"]:
+        print("Found solution:", result["solution"])
+        draw_path_walls(result["solution"], grid, walls, "sol.png")
+    else:
+        print("No solution after", result["checked"], "checks")
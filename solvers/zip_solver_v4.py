@@ -0,0 +1,325 @@
+# v3 on bitboards: visited cells, walls and neighbors are int masks (bit r * N + c)
+
+from solvers import ordering as ordering_
+from solvers import pruning
+from solvers.ordering import DEFAULT_ORDERING
+from solvers.pruning import DEFAULT_RULES
+from solvers.transposition import TranspositionTable
+
+
+class Board:
+    """Precomputed bitboard view of a grid + walls."""
+
+    def __init__(self, grid, walls):
+        N = len(grid)
+        self.N = N
+        self.size = N * N
+        self.full = (1 << self.size) - 1
+        self.values = [grid[r][c] for r in range(N) for c in range(N)]
+        self.rows = [i // N for i in range(self.size)]
+        self.cols = [i % N for i in range(self.size)]
+
+        self.positions = {v: i for i, v in enumerate(self.values) if v != 0}
+        if self.positions:
+            self.start, self.end = min(self.positions), max(self.positions)
+        else:
+            self.start = self.end = None
+        # positions keeps one cell per number: a well-formed board has every
+        # number from start to end exactly once
+        numbers = sum(1 for v in self.values if v != 0)
+        self.consecutive = numbers == len(self.positions) and (
+            not self.positions or numbers == self.end - self.start + 1
+        )
+
+        self.border = [
+            min(r, c, N - 1 - r, N - 1 - c) for r, c in zip(self.rows, self.cols)
+        ]
+
+        # checkerboard color: every step of the path flips it
+        self.black = sum(1 << i for i in range(self.size) if (i // N + i % N) % 2 == 0)
+
+        # chain[v]: Manhattan distance from number v through every later number
+        # to the last one (a lower bound on the cells those segments use)
+        self.chain = {}
+        if self.positions:
+            total = 0
+            self.chain[self.end] = 0
+            for v in range(self.end - 1, self.start - 1, -1):
+                if v not in self.positions or v + 1 not in self.positions:
+                    break
+                total += self.distance(self.positions[v], self.positions[v + 1])
+                self.chain[v] = total
+
+        wallset = {tuple(map(tuple, w)) for w in walls}
+
+        def open_edge(a, b):
+            return (a, b) not in wallset and (b, a) not in wallset
+
+        # same order as v3 (down, up, right, left) so the DFS visits nodes identically
+        self.neighbors = []
+        self.nbr_mask = []
+        self.can_down = self.can_up = self.can_right = self.can_left = 0
+        for i in range(self.size):
+            r, c = self.rows[i], self.cols[i]
+            nbrs = []
+            for nr, nc in [(r + 1, c), (r - 1, c), (r, c + 1), (r, c - 1)]:
+                if 0 <= nr < N and 0 <= nc < N and open_edge((r, c), (nr, nc)):
+                    nbrs.append(nr * N + nc)
+                    if nr > r:
+                        self.can_down |= 1 << i
+                    elif nr < r:
+                        self.can_up |= 1 << i
+                    elif nc > c:
+                        self.can_right |= 1 << i
+                    else:
+                        self.can_left |= 1 << i
+            self.neighbors.append(nbrs)
+            self.nbr_mask.append(sum(1 << j for j in nbrs))
+
+        # 8-neighborhood around each cell, used for the local articulation test
+        self.ring_mask = [
+            sum(
+                1 << (nr * N + nc)
+                for nr in range(r - 1, r + 2)
+                for nc in range(c - 1, c + 2)
+                if 0 <= nr < N and 0 <= nc < N and (nr, nc) != (r, c)
+            )
+            for r, c in zip(self.rows, self.cols)
+        ]
+
+    def distance(self, i, j):
+        return abs(self.rows[i] - self.rows[j]) + abs(self.cols[i] - self.cols[j])
+
+    def cell(self, i):
+        return self.rows[i], self.cols[i]
+
+    def to_cells(self, path):
+        return [(self.rows[i], self.cols[i]) for i in path]
+
+    def expand(self, mask):
+        """All cells one open step away from any cell in mask."""
+        N = self.N
+        return (
+            ((mask & self.can_down) << N)
+            | ((mask & self.can_up) >> N)
+            | ((mask & self.can_right) << 1)
+            | ((mask & self.can_left) >> 1)
+        )
+
+    def flood(self, seed, free):
+        """Cells of free reachable from the seed mask."""
+        reach = front = seed
+        while front:
+            front = self.expand(front) & free & ~reach
+            reach |= front
+        return reach
+
+    def stays_connected(self, p, h, free):
+        """Incremental connectivity check for the step p -> h.
+
+        The parent state passed the check, so free | h is connected once p is
+        added back. Dropping p keeps it connected iff p is not an articulation
+        point: trivially when h is p's only open neighbor, or when p's open
+        neighbors meet inside the 3x3 ring around p. Only if that local test
+        fails is the whole unvisited region flooded again."""
+        bit = 1 << h
+        open_cells = free | bit
+        nbrs = self.nbr_mask[p] & open_cells
+        if nbrs == bit:
+            return True
+        if self.flood(bit, self.ring_mask[p] & open_cells) & nbrs == nbrs:
+            return True
+        return self.flood(bit, free) & free == free
+
+    def dead_ends(self, head, free):
+        """Open cells with fewer than two open neighbors (head counts as open).
+        Such a cell can only be the last cell of the path."""
+        N = self.N
+        open_cells = free | 1 << head
+        d = (open_cells >> N) & self.can_down
+        u = (open_cells << N) & self.can_up
+        r = (open_cells >> 1) & self.can_right
+        l = (open_cells << 1) & self.can_left
+        two = (d & u) | (d & r) | (d & l) | (u & r) | (u & l) | (r & l)
+        return free & ~two
+
+
+def unroll(node):
+    """Path as a list of cell indices from a (cell, parent) node chain."""
+    path = []
+    while node is not None:
+        path.append(node[0])
+        node = node[1]
+    path.reverse()
+    return path
+
+
+def search(
+    board,
+    stack,
+    rules=DEFAULT_RULES,
+    ordering=DEFAULT_ORDERING,
+    tt=None,
+    on_progress=None,
+    stop_event=None,
+    progress_interval=30000,
+    split_depth=None,
+    frontier=None,
+    share=None,
+    budget=None,
+):
+    """DFS from the given stack of (cell, next_search, path, visited) frames,
+    where path is the cells so far as a (cell, parent) node chain (None when
+    empty; see unroll), so a child shares its parent's path instead of
+    copying it. Cuts every state that one of the named pruning rules rejects
+    and expands children in the named move ordering.
+    tt: optional TranspositionTable; expanded states whose subtree fails are
+    stored in it and skipped when reached again.
+    on_progress gets {"checked", "path", "pruned"[, "tt"]} every
+    progress_interval checks.
+    With split_depth, nodes at that path length are not searched here: their
+    child frames go to the frontier list (used to hand subtrees to workers).
+    share(stack), if given, is called every progress_interval checks and may
+    move frames off the stack to hand them to other workers.
+    With budget, the search pauses at the first progress point past budget
+    checks: the node in hand goes back on the stack, so calling search again
+    with the same stack carries on (see solvers.stream).
+    Returns (solution path as cell indices or None, checked, pruned) where
+    pruned counts the nodes cut by each rule."""
+    values, neighbors = board.values, board.neighbors
+    size, full, end = board.size, board.full, board.end
+    rules = pruning.get_rules(rules)
+    order = ordering_.get_ordering(ordering)
+    pruned = {name: 0 for name, _ in rules}
+
+    checked = 0
+    last_update = 0
+
+    while stack:
+        i, next_search, path, visited = stack.pop()
+        if i < 0:
+            # exit marker: the whole subtree of this state failed
+            tt.store(next_search, path)
+            continue
+        bit = 1 << i
+        if visited & bit:
+            continue
+
+        checked += 1
+        if checked - last_update >= progress_interval:
+            if budget is not None and checked >= budget:
+                stack.append((i, next_search, path, visited))
+                return None, checked - 1, pruned
+            if stop_event is not None and stop_event.is_set():
+                break
+            if on_progress is not None:
+                msg = {
+                    "checked": checked,
+                    "path": unroll((i, path)),
+                    "pruned": dict(pruned),
+                }
+                if tt is not None:
+                    msg["tt"] = tt.stats()
+                on_progress(msg)
+            if share is not None:
+                share(stack)
+            last_update = checked
+
+        new_next = next_search
+        cell_val = values[i]
+        if cell_val == next_search:
+            if next_search == end:
+                if visited | bit == full:
+                    return unroll((i, path)), checked, pruned
+                continue
+            new_next += 1
+        elif cell_val != 0:
+            continue
+
+        new_path = (i, path)
+        new_visited = visited | bit
+        free = full & ~new_visited
+        parent = path[0] if path is not None else None
+
+        for name, rule in rules:
+            if not rule(board, parent, i, new_next, new_visited, free):
+                pruned[name] += 1
+                break
+        else:
+            if tt is not None:
+                key = new_visited * size + i
+                if tt.lookup(key):
+                    continue
+            children = [j for j in neighbors[i] if free >> j & 1]
+            if order is not None and len(children) > 1:
+                children = order(board, children, new_next, free)
+            if split_depth is not None and new_visited.bit_count() >= split_depth:
+                # preferred move first, the way the DFS would have taken them
+                frontier.extend(
+                    (j, new_next, new_path, new_visited) for j in reversed(children)
+                )
+                continue
+            if tt is not None:
+                stack.append((-1, key, new_visited.bit_count(), 0))
+            for j in children:
+                stack.append((j, new_next, new_path, new_visited))
+
+    return None, checked, pruned
+
+
+def solve(
+    grid,
+    walls,
+    rules=DEFAULT_RULES,
+    ordering=DEFAULT_ORDERING,
+    tt_mb=0,
+    tt_policy="lru",
+    on_progress=None,
+    stop_event=None,
+    progress_interval=30000,
+):
+    """tt_mb > 0 enables the failure memo with that memory cap (see
+    solvers.transposition). Returns {"found": bool, "solution": [(r, c), ...]
+    or None, "checked": int, "pruned": {rule: nodes cut}[, "tt": stats]}."""
+    board = Board(grid, walls)
+    if board.start is None or not pruning.feasible(board):
+        return {"found": False, "solution": None, "checked": 0, "pruned": {}}
+    tt = TranspositionTable(tt_mb, tt_policy) if tt_mb else None
+
+    def progress(msg):
+        msg["path"] = board.to_cells(msg["path"])
+        on_progress(msg)
+
+    stack = [(board.positions[board.start], board.start, None, 0)]
+    solution, checked, pruned = search(
+        board,
+        stack,
+        rules=rules,
+        ordering=ordering,
+        tt=tt,
+        on_progress=progress if on_progress else None,
+        stop_event=stop_event,
+        progress_interval=progress_interval,
+    )
+    result = {
+        "found": solution is not None,
+        "solution": board.to_cells(solution) if solution is not None else None,
+        "checked": checked,
+        "pruned": pruned,
+    }
+    if tt is not None:
+        result["tt"] = tt.stats()
+    return result
+
+
+if __name__ == "__main__":
+    from solvers.grids import grid, walls
+    from solvers.utils import draw_path_walls
+
+    result = solve(grid, walls)
+    print("Pruned:", result["pruned"])
+    if result["found"]:
+        print("Found solution:", result["solution"])
+        draw_path_walls(result["solution"], grid, walls, "sol.png")
+    else:
+        print("No solution after", result["checked"], "checks")